@@ -10,23 +10,34 @@ Fecha: 2025
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog, font as tkfont
+import bisect
 import configparser
+import contextlib
+import functools
+import io
 import json
+import operator
 import os
+import pickle
 import sys
 import re
 import threading
+import queue
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from types import MappingProxyType
 from datetime import datetime, date, timedelta
 from typing import Optional
 import time
 import calendar
+import itertools
 
 # Intentar importar dependencias
 try:
     import pandas as pd
     from openpyxl import load_workbook
+    from openpyxl.utils import get_column_letter
 except ImportError as e:
     print(f"Error: Falta instalar dependencias. Ejecute: pip install pandas openpyxl")
     sys.exit(1)
@@ -44,58 +55,85 @@ try:
 except ImportError:
     HAS_TKCALENDAR = False
 
+# orjson es opcional: acelera la lectura/escritura de los archivos JSON
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# python-calamine es opcional: lector de Excel mucho más rápido que openpyxl
+try:
+    import python_calamine
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+# xlsxwriter es opcional: escribe el Excel de salida más rápido que openpyxl
+try:
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
 
 # ============================================
 # CONFIGURACIÓN POR DEFECTO
 # ============================================
 
-DEFAULT_CONFIG = {
-    "General": {
+# Columnas a combinar en la estadística calculada (ya separadas)
+DEFAULT_MERGE_COLUMNS = MappingProxyType({
+    "HospitalizacionTotal": ("Hospitalización", "URGENTE HOSPITALIZACION"),
+    "ConsultaExternaTotal": ("Consulta Externa", "URGENTE CONSULTA EXTERNA", "REFERENCIA", "URGENTE REFERENCIA"),
+    "Emergencia": ("Emergencia", "Sin tipo atención")
+})
+
+DEFAULT_CONFIG = MappingProxyType({
+    "General": MappingProxyType({
         "URL": "https://hjmvi.orion-labs.com/informes/estadisticos",
         "URLCatalogo": "https://hjmvi.orion-labs.com/informes/catalogos",
         "Headless": "false"
-    },
-    "Informe": {
+    }),
+    "Informe": MappingProxyType({
         "IdDropdownAgrupar": "agrupar-por",
         "ValorAgrupacion": "SECCION_TIPO_ATENCION",
         "IdFechaDesde": "fecha-orden-desde",
         "IdFechaHasta": "fecha-orden-hasta"
-    },
-    "Catalogo": {
+    }),
+    "Catalogo": MappingProxyType({
         "IdDropdownTipo": "tipo",
         "ValorExamenes": "EXAMENES",
         "IdBotonGenerar": "generar-informe-auditorias"
-    },
-    "Archivos": {
+    }),
+    "Archivos": MappingProxyType({
         "CarpetaDescargas": "./ExcelsDescargados",
         "ArchivoSalida": "./Estadistica Hospital.xlsx",
         "ArchivoCatalogo": "./catalogo_examenes.json"
-    },
-    "ColumnasMerge": {
-        "HospitalizacionTotal": "Hospitalización,URGENTE HOSPITALIZACION",
-        "ConsultaExternaTotal": "Consulta Externa,URGENTE CONSULTA EXTERNA,REFERENCIA,URGENTE REFERENCIA",
-        "Emergencia": "Emergencia,Sin tipo atención"
-    }
-}
+    }),
+    # Forma de texto (separada por comas) usada en config.ini
+    "ColumnasMerge": MappingProxyType({
+        key: ",".join(cols) for key, cols in DEFAULT_MERGE_COLUMNS.items()
+    })
+})
 
-DEFAULT_EXAM_CONFIG = {
-    "multipliers": {
+DEFAULT_EXAM_CONFIG = MappingProxyType({
+    "multipliers": MappingProxyType({
         "BIOMETRÍA HEMÁTICA": 18,
         "COPROPARASITARIO": 2,
         "ELEMENTAL Y MICROSCÓPICO DE ORINA": 3,
         "GASOMETRIA ARTERIAL": 14,
         "GASOMETRIA VENOSA": 14,
         "TIPIFICACION SANGUINEA RH (D)": 3
-    },
+    }),
     "cultivo_multiplier": 10,
-    "exam_categories": {
+    "exam_categories": MappingProxyType({
         "LEISHMANIA": "Hematologico",
         "CRISTALOGRAFÍA": "Bacteriológico",
         "GRAM (GOTA FRESCA) ORINA": "Bacteriológico",
         "GASOMETRIA ARTERIAL": "Quimica sanguinea",
         "GASOMETRIA VENOSA": "Quimica sanguinea"
-    },
-    "seccion_categories": {
+    }),
+    "seccion_categories": MappingProxyType({
         # Secciones que van a Serologicos
         "Autoinmunes e Infecciosas": "Serologicos",
         "Drogas y Fármacos": "Serologicos",
@@ -136,20 +174,318 @@ DEFAULT_EXAM_CONFIG = {
         "Citología": "Bacteriológico",
         "Especiales": "Other",
         "Medicina Ocupacional": "Other"
-    }
-}
+    })
+})
 
-NUMERIC_COLUMNS = [
+NUMERIC_COLUMNS = (
     "REFERENCIA", "Hospitalización", "Emergencia",
     "URGENTE CONSULTA EXTERNA", "Consulta Externa",
     "Sin tipo atención", "URGENTE REFERENCIA",
     "URGENTE HOSPITALIZACION", "Total"
-]
+)
 
-CATEGORY_ORDER = [
+CATEGORY_ORDER = (
     "Hematologico", "Bacteriológico", "Quimica sanguinea",
     "Materias fecales", "Orina", "Hormonales", "Serologicos", "Other", "TOTAL"
-]
+)
+
+# Tipo categórico ordenado para la columna Category (agrupa y ordena por códigos int8)
+CATEGORY_DTYPE = pd.CategoricalDtype(CATEGORY_ORDER, ordered=True)
+
+# Posición (código) de cada categoría en CATEGORY_ORDER, para búsquedas O(1)
+CATEGORY_INDEX = MappingProxyType({cat: code for code, cat in enumerate(CATEGORY_ORDER)})
+
+# Tamaño de buffer para leer/escribir los archivos de configuración y catálogo
+FILE_BUFFER_SIZE = 1 << 20
+
+# Máximo de líneas que conserva el widget de log (las más antiguas se descartan)
+MAX_LOG_LINES = 2000
+
+# Filas que se insertan de una vez en los Treeview (el resto al desplazarse)
+TREE_PAGE_SIZE = 200
+
+# Lambda Tcl (apply) que inserta una lista de filas en un Treeview en una sola llamada
+TREE_BULK_INSERT_TCL = "{tree rows} {foreach row $rows {$tree insert {} end -values $row}}"
+
+# Segundos durante los que se reutiliza la comprobación de existencia del Excel
+EXCEL_STAT_TTL = 2.0
+
+# Intervalo mínimo (s) entre repintados forzados desde log()/update_progress()
+UI_REFRESH_INTERVAL = 0.1
+
+# Pestañas del navegador que generan informes diarios a la vez
+REPORT_PAGES = 4
+
+# Motor de pd.read_excel para los informes diarios (calamine requiere pandas >= 2.2)
+EXCEL_READ_ENGINE = (
+    "calamine"
+    if HAS_CALAMINE and tuple(int(x) for x in pd.__version__.split(".")[:2]) >= (2, 2)
+    else None
+)
+
+# Filas de los informes que no son exámenes (totales, pie del informe o vacías)
+SKIP_EXAM_PATTERN = re.compile(r'^(?:Total órdenes|Generado el|$)')
+
+# Identificador de la cabecera de la caché en pickle del catálogo
+CATALOG_CACHE_MAGIC = "EHCAT1"
+
+# Secciones del catálogo de exámenes a descargar
+CATALOG_SECTIONS = (
+    "Autoinmunes e Infecciosas",
+    "Biología Molecular",
+    "Bioquímica",
+    "Citología",
+    "Coagulación",
+    "Coproanálisis",
+    "Drogas y Fármacos",
+    "Electrolitos",
+    "Especiales",
+    "Estudios de Alergias",
+    "Estudios Hormonales",
+    "Gases Arteriales",
+    "Hematología",
+    "Inmunohematología",
+    "Inmunología",
+    "Inmunoquímica Sanguínea",
+    "Líquidos Biológicos",
+    "Marcadores Coronarios",
+    "Marcadores Tumorales",
+    "Medicina Ocupacional",
+    "Microbiología",
+    "Plaquetas",
+    "Química Clínica en Orina",
+    "Serología",
+    "Uroanálisis",
+)
+
+
+@functools.lru_cache(maxsize=4)
+def read_config_sections(path: str, mtime_ns: int) -> tuple:
+    """Lee config.ini y devuelve sus secciones como tuplas inmutables.
+    
+    La caché se indexa por fecha de modificación: si el archivo no cambió
+    no se vuelve a parsear.
+    """
+    parser = configparser.ConfigParser()
+    with open(path, 'rb', buffering=FILE_BUFFER_SIZE) as f:
+        parser.read_string(f.read().decode('utf-8'), source=path)
+    return tuple((section, tuple(parser.items(section, raw=True)))
+                 for section in parser.sections())
+
+
+def parse_default_config() -> tuple:
+    """Devuelve DEFAULT_CONFIG con las claves ya normalizadas por configparser"""
+    parser = configparser.ConfigParser()
+    parser.read_dict(DEFAULT_CONFIG)
+    return tuple((section, tuple(parser.items(section, raw=True)))
+                 for section in parser.sections())
+
+
+# Valores por defecto parseados una sola vez al importar el módulo
+DEFAULT_CONFIG_SECTIONS = parse_default_config()
+
+
+def load_json_file(path: Path):
+    """Lee un archivo JSON (con orjson si está disponible)"""
+    # Lectura binaria de una sola vez con buffer grande; se decodifica después
+    with open(path, 'rb', buffering=FILE_BUFFER_SIZE) as f:
+        data = f.read()
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
+
+
+def write_file_if_changed(path: Path, content: bytes) -> bool:
+    """Escribe el archivo de forma atómica solo si su contenido cambió.
+    
+    Devuelve True si se escribió el archivo.
+    """
+    try:
+        if path.stat().st_size == len(content):
+            with open(path, 'rb', buffering=FILE_BUFFER_SIZE) as f:
+                if f.read() == content:
+                    return False
+    except OSError:
+        pass
+    
+    temp_file = path.with_name(path.name + ".tmp")
+    with open(temp_file, 'wb', buffering=FILE_BUFFER_SIZE) as f:
+        f.write(content)
+    os.replace(temp_file, path)
+    return True
+
+
+def create_file_if_missing(path: Path, make_content) -> bool:
+    """Crea el archivo con el contenido de make_content() solo si no existe.
+    
+    La apertura exclusiva ('xb') comprueba y crea en una sola operación.
+    Devuelve True si se creó el archivo.
+    """
+    try:
+        with open(path, 'xb', buffering=FILE_BUFFER_SIZE) as f:
+            f.write(make_content())
+    except FileExistsError:
+        return False
+    return True
+
+
+def dump_json(data) -> bytes:
+    """Serializa datos como JSON indentado en UTF-8 (con orjson si está disponible)"""
+    if HAS_ORJSON:
+        # OPT_NON_STR_KEYS: claves numéricas (p. ej. nombres que Tk devuelve como int)
+        # se escriben como texto, igual que con json
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def save_json_file(path: Path, data):
+    """Guarda datos como JSON indentado en UTF-8"""
+    write_file_if_changed(path, dump_json(data))
+
+
+def read_exam_catalog(catalog_file: Path) -> dict:
+    """Lee el catálogo JSON usando una copia en pickle como caché.
+    
+    La copia (<catálogo>.pkl) empieza con una cabecera en texto con la fecha de
+    modificación (ns) y el tamaño del JSON del que se generó. Solo se deserializa
+    si la cabecera coincide exactamente con el JSON actual; en caso contrario
+    (copia ajena, antigua o sin cabecera) se lee el JSON y se regenera la copia.
+    """
+    cache_file = catalog_file.with_name(catalog_file.name + ".pkl")
+    json_stat = catalog_file.stat()
+    header = f"{CATALOG_CACHE_MAGIC} {json_stat.st_mtime_ns} {json_stat.st_size}\n".encode('ascii')
+    
+    try:
+        with open(cache_file, 'rb', buffering=FILE_BUFFER_SIZE) as f:
+            if f.readline(len(header)) == header:
+                return pickle.load(f)
+    except Exception:
+        pass
+    
+    catalog = load_json_file(catalog_file)
+    
+    # Escritura atómica para no dejar una caché a medias
+    try:
+        temp_file = cache_file.with_name(cache_file.name + ".tmp")
+        with open(temp_file, 'wb', buffering=FILE_BUFFER_SIZE) as f:
+            f.write(header)
+            pickle.dump(catalog, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+    except OSError:
+        pass
+    
+    return catalog
+
+
+def catalog_meta_file(catalog_file: Path) -> Path:
+    """Ruta del resumen del catálogo (<catálogo>_meta.json), junto al catálogo"""
+    return catalog_file.with_name(f"{catalog_file.stem}_meta.json")
+
+
+def summarize_exam_catalog(catalog: dict) -> dict:
+    """Resumen del catálogo para las etiquetas: última actualización y conteos"""
+    examenes = catalog.get("examenes", {})
+    if isinstance(examenes, dict):
+        secciones = len(examenes)
+        total = sum(len(exams) for exams in examenes.values())
+    elif isinstance(examenes, list):
+        secciones = None
+        total = len(examenes)
+    else:
+        secciones = None
+        total = None
+    return {
+        "ultima_actualizacion": catalog.get("ultima_actualizacion"),
+        "secciones": secciones,
+        "examenes": total,
+    }
+
+
+@functools.lru_cache(maxsize=8)
+def read_json_cached(path: str, mtime_ns: int):
+    """Lee un archivo JSON; la caché se invalida cuando cambia su fecha de modificación"""
+    return load_json_file(Path(path))
+
+
+@functools.lru_cache(maxsize=8)
+def read_exam_catalog_cached(path: str, mtime_ns: int) -> dict:
+    """Lee el catálogo de exámenes; la caché se invalida cuando cambia su fecha de modificación"""
+    return read_exam_catalog(Path(path))
+
+
+def editable_exam_config(exam_config) -> dict:
+    """Devuelve una copia editable (dos niveles) de una configuración de exámenes"""
+    return {key: dict(value) if isinstance(value, (dict, MappingProxyType)) else value
+            for key, value in exam_config.items()}
+
+
+def default_exam_config() -> dict:
+    """Devuelve una copia editable de DEFAULT_EXAM_CONFIG"""
+    return editable_exam_config(DEFAULT_EXAM_CONFIG)
+
+
+def list_downloaded_files(folder: Path) -> list:
+    """Devuelve, ordenados, los Excel diarios descargados en la carpeta"""
+    # Una sola enumeración del directorio: nombre que empieza por la fecha
+    # (YYYY-MM-DD.xlsx), sin stat por archivo ni expresión regular
+    try:
+        with os.scandir(folder) as entries:
+            names = sorted(
+                entry.name for entry in entries
+                if entry.name[:1].isdigit() and entry.name.endswith('.xlsx') and entry.is_file()
+            )
+    except FileNotFoundError:
+        return []
+    return [folder / name for name in names]
+
+
+def extract_section_exams(rows) -> Optional[list]:
+    """Extrae los exámenes de las filas de un informe de sección (None si no tiene encabezado)"""
+    header = next(rows, None)
+    if not header:
+        return None
+    
+    # Buscar la columna de exámenes (por defecto, la primera)
+    exam_idx = next((i for i, col in enumerate(header) if 'examen' in str(col).lower()), 0)
+    
+    # Sin vacíos ni las líneas de encabezado/pie del informe
+    examenes = []
+    for row in rows:
+        if exam_idx >= len(row) or row[exam_idx] is None:
+            continue
+        text = str(row[exam_idx])
+        stripped = text.strip()
+        if stripped and not text.startswith(("Hospital", "Generado")):
+            examenes.append(stripped)
+    return examenes
+
+
+def read_catalog_section(source) -> Optional[list]:
+    """Lee el informe xlsx (ruta o bytes) de una sección y devuelve sus exámenes (None si está vacío)"""
+    # Contenido que no es un xlsx (p. ej. una página HTML de error) hace fallar
+    # load_workbook, y quien llama registra el error y omite la sección
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    
+    # Lectura en streaming (read_only) de la primera hoja, sin construir un DataFrame
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        # El encabezado es la fila siguiente a las 3 de título
+        return extract_section_exams(wb.worksheets[0].iter_rows(min_row=4, values_only=True))
+    finally:
+        wb.close()
+
+
+def excel_column_widths(df) -> list:
+    """Ancho de cada columna en Excel: texto más largo (incluido el encabezado) + 2, máximo 50"""
+    widths = []
+    for col in df.columns:
+        values = df[col]
+        # Las celdas vacías (NaN/None) no cuentan, igual que en la hoja escrita
+        lengths = values[values.notna()].astype(str).str.len()
+        max_length = max(len(str(col)), int(lengths.max()) if len(lengths) else 0)
+        widths.append(min(max_length + 2, 50))
+    return widths
 
 
 # ============================================
@@ -157,6 +493,29 @@ CATEGORY_ORDER = [
 # ============================================
 
 class EstadisticaHospitalApp:
+    # Campos de la pestaña Configuración Web, agrupados por marco:
+    # (título del marco, fila inicial, ((etiqueta, atributo, sección, clave, ancho), ...))
+    CONFIG_TAB_FIELDS = (
+        ("Configuración del Sitio Web", 0, (
+            ("URL del sitio:", "url_var", "General", "URL", 60),
+        )),
+        ("Elementos del Formulario (IDs HTML)", 0, (
+            ("ID Dropdown Agrupar:", "dropdown_id_var", "Informe", "IdDropdownAgrupar", 30),
+            ("Valor a seleccionar:", "dropdown_value_var", "Informe", "ValorAgrupacion", 30),
+            ("ID Campo Fecha Desde:", "fecha_desde_var", "Informe", "IdFechaDesde", 30),
+            ("ID Campo Fecha Hasta:", "fecha_hasta_var", "Informe", "IdFechaHasta", 30),
+        )),
+        ("Rutas de Archivos", 0, (
+            ("Carpeta de descargas:", "downloads_folder_var", "Archivos", "CarpetaDescargas", 40),
+            ("Archivo de salida:", "output_file_var", "Archivos", "ArchivoSalida", 40),
+        )),
+        ("Columnas a Combinar en Estadística Calculada", 1, (
+            ("Hospitalización Total =", "hosp_total_var", "ColumnasMerge", "HospitalizacionTotal", 50),
+            ("Consulta Externa Total =", "cons_total_var", "ColumnasMerge", "ConsultaExternaTotal", 50),
+            ("Emergencia =", "emerg_var", "ColumnasMerge", "Emergencia", 50),
+        )),
+    )
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Estadística Hospital v3.6.3")
@@ -174,8 +533,9 @@ class EstadisticaHospitalApp:
         
         # Cargar configuraciones (crea archivos si no existen)
         self.config = self.load_config()
+        self.refresh_settings()
         self.exam_config = self.load_exam_config()
-        self.exam_catalog = self.load_exam_catalog()
+        self._exam_catalog = None  # El catálogo se carga al primer acceso
         
         # Guardar configuraciones por defecto si son nuevas
         self.ensure_config_files_exist()
@@ -183,18 +543,40 @@ class EstadisticaHospitalApp:
         # Variables de control
         self.should_stop = False
         self.is_running = False
-        self.output_file_path = self.base_dir / self.config.get("Archivos", "ArchivoSalida")
         
-        # Crear interfaz
+        # Cola de eventos de UI: los hilos de trabajo nunca tocan Tk directamente
+        self.ui_queue = queue.Queue()
+        self.last_ui_refresh = 0.0
+        
+        # Navegador del catálogo: se reutiliza entre descargas desde un hilo dedicado
+        self.catalog_jobs = queue.Queue()
+        self.catalog_thread = None
+        self.catalog_playwright = None
+        self.catalog_context = None
+        self.catalog_running = False
+        
+        # Filas de Treeview pendientes de insertar: str(tree) -> [filas, siguiente índice]
+        self.tree_pending = {}
+        self.tree_page_scheduled = set()
+        
+        # Versión de las categorías (se incrementa en cada cambio) y caché de "Sin Categorizar"
+        self.categories_version = 0
+        self.uncategorized_cache = None
+        self.output_file_path = self.base_dir / self.get_setting("Archivos", "ArchivoSalida")
+        
+        # Crear interfaz (las pestañas secundarias se construyen al abrirlas)
         self.create_notebook()
         self.create_main_tab()
-        self.create_config_tab()
-        self.create_exams_tab()
-        self.create_categories_tab()
         
         # Habilitar botón de Excel si el archivo existe
-        if self.output_file_path.exists():
-            self.open_excel_button.config(state="normal")
+        self.excel_stat_time = None
+        self.refresh_excel_button_state()
+        
+        # Procesar periódicamente los eventos enviados por los hilos de trabajo
+        self.root.after(50, self.poll_ui_queue)
+        
+        # Cerrar el navegador del catálogo (si quedó abierto) al salir
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
     
     def setup_fonts(self):
         """Configura fuentes más grandes para toda la aplicación"""
@@ -207,96 +589,183 @@ class EstadisticaHospitalApp:
         fixed_font = tkfont.nametofont("TkFixedFont")
         fixed_font.configure(size=10)
         
-        # Configurar estilo para widgets ttk
-        style = ttk.Style()
-        style.configure(".", font=("Segoe UI", 11))
-        style.configure("TLabel", font=("Segoe UI", 11))
-        style.configure("TButton", font=("Segoe UI", 11))
-        style.configure("TEntry", font=("Segoe UI", 11))
-        style.configure("TCombobox", font=("Segoe UI", 11))
-        style.configure("TCheckbutton", font=("Segoe UI", 11))
-        style.configure("TLabelframe.Label", font=("Segoe UI", 11, "bold"))
-        style.configure("TNotebook.Tab", font=("Segoe UI", 11))
-        style.configure("Treeview", font=("Segoe UI", 10), rowheight=25)
-        style.configure("Treeview.Heading", font=("Segoe UI", 11, "bold"))
+        # Fuentes con nombre: se crean una sola vez y los widgets las referencian
+        self.font_normal = tkfont.Font(self.root, family="Segoe UI", size=11)
+        self.font_bold = tkfont.Font(self.root, family="Segoe UI", size=11, weight="bold")
+        self.font_tree = tkfont.Font(self.root, family="Segoe UI", size=10)
+        self.font_italic = tkfont.Font(self.root, family="Segoe UI", size=10, slant="italic")
+        self.font_log = tkfont.Font(self.root, family="Consolas", size=10)
+        self.font_small = tkfont.Font(self.root, size=9)
+        self.font_small_italic = tkfont.Font(self.root, size=9, slant="italic")
+        self.font_tiny_italic = tkfont.Font(self.root, size=8, slant="italic")
+        
+        # Configurar estilo para widgets ttk: un único objeto Style; "." se
+        # hereda en todos los widgets, solo se redefinen los que difieren
+        style = ttk.Style(self.root)
+        style.theme_use('clam')
+        style.configure(".", font=self.font_normal)
+        style.configure("TLabelframe.Label", font=self.font_bold)
+        style.configure("Treeview", font=self.font_tree, rowheight=25)
+        style.configure("Treeview.Heading", font=self.font_bold)
     
     def ensure_config_files_exist(self):
         """Crea archivos de configuración si no existen"""
         # config.ini
-        config_file = self.base_dir / "config.ini"
-        if not config_file.exists():
-            self.save_config()
+        create_file_if_missing(self.base_dir / "config.ini", self.config_bytes)
         
         # config_examenes.json
-        exam_config_file = self.base_dir / "config_examenes.json"
-        if not exam_config_file.exists():
-            self.save_exam_config()
+        create_file_if_missing(self.base_dir / "config_examenes.json",
+                               lambda: dump_json(self.exam_config))
         
     def load_config(self) -> configparser.ConfigParser:
         """Carga la configuración general"""
         config = configparser.ConfigParser()
         config_file = self.base_dir / "config.ini"
         
-        # Establecer valores por defecto
-        for section, values in DEFAULT_CONFIG.items():
-            config[section] = values
+        # Valores por defecto ya parseados; el archivo se combina encima y
+        # configparser recibe todo en una única llamada a read_dict
+        merged = {section: dict(items) for section, items in DEFAULT_CONFIG_SECTIONS}
         
-        # Intentar cargar archivo existente
-        if config_file.exists():
-            try:
-                config.read(config_file, encoding='utf-8')
-            except:
-                pass
+        # Intentar cargar archivo existente (parseado solo si cambió)
+        try:
+            mtime_ns = config_file.stat().st_mtime_ns
+            for section, items in read_config_sections(str(config_file), mtime_ns):
+                merged.setdefault(section, {}).update(items)
+        except:
+            pass
         
+        config.read_dict(merged)
         return config
     
+    def refresh_settings(self):
+        """Extrae los valores de configuración a diccionarios simples"""
+        self.settings = {section: dict(self.config.items(section))
+                         for section in self.config.sections()}
+    
+    def get_setting(self, section: str, key: str, fallback: Optional[str] = None) -> Optional[str]:
+        """Obtiene un valor de configuración sin pasar por configparser (por defecto, el de DEFAULT_CONFIG)"""
+        value = self.settings.get(section, {}).get(self.config.optionxform(key))
+        if value is not None:
+            return value
+        if fallback is not None:
+            return fallback
+        return DEFAULT_CONFIG.get(section, {}).get(key)
+    
+    def config_bytes(self) -> bytes:
+        """Serializa la configuración general tal como se guarda en config.ini"""
+        buffer = io.StringIO()
+        self.config.write(buffer)
+        # Mismos saltos de línea que la escritura en modo texto
+        return buffer.getvalue().replace("\n", os.linesep).encode('utf-8')
+    
     def save_config(self):
         """Guarda la configuración general"""
-        config_file = self.base_dir / "config.ini"
-        with open(config_file, 'w', encoding='utf-8') as f:
-            self.config.write(f)
+        self.refresh_settings()
+        write_file_if_changed(self.base_dir / "config.ini", self.config_bytes())
     
     def load_exam_config(self) -> dict:
         """Carga la configuración de exámenes"""
         config_file = self.base_dir / "config_examenes.json"
         
-        if config_file.exists():
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
+        try:
+            mtime_ns = config_file.stat().st_mtime_ns
+            # Copia: la GUI modifica la configuración y no debe alterar la caché
+            return editable_exam_config(read_json_cached(str(config_file), mtime_ns))
+        except:
+            pass
         
-        return DEFAULT_EXAM_CONFIG.copy()
+        return default_exam_config()
     
     def save_exam_config(self):
         """Guarda la configuración de exámenes"""
         config_file = self.base_dir / "config_examenes.json"
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.exam_config, f, indent=2, ensure_ascii=False)
+        save_json_file(config_file, self.exam_config)
     
     def load_exam_catalog(self) -> dict:
         """Carga el catálogo de exámenes"""
-        catalog_file = self.base_dir / self.config.get("Archivos", "ArchivoCatalogo", fallback="catalogo_examenes.json")
+        catalog_file = self.base_dir / self.get_setting("Archivos", "ArchivoCatalogo")
         
-        if catalog_file.exists():
-            try:
-                with open(catalog_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
+        try:
+            mtime_ns = catalog_file.stat().st_mtime_ns
+            return read_exam_catalog_cached(str(catalog_file), mtime_ns)
+        except:
+            pass
         
         return {"examenes": [], "ultima_actualizacion": None}
     
-    def save_exam_catalog(self, examenes: list):
-        """Guarda el catálogo de exámenes"""
-        catalog_file = self.base_dir / self.config.get("Archivos", "ArchivoCatalogo", fallback="catalogo_examenes.json")
+    def set_exam_catalog(self, catalog: dict):
+        """Establece el catálogo y precalcula la lista de exámenes para el combobox"""
+        examenes_dict = catalog.get("examenes", {})
+        
+        # Handle both old format (list) and new format (dict by section)
+        if isinstance(examenes_dict, list):
+            examenes = examenes_dict
+        else:
+            # Flatten dict to list
+            examenes = []
+            for section_exams in examenes_dict.values():
+                examenes.extend(section_exams)
+        
+        # Lista única ordenada y su versión en mayúsculas para el filtro
+        exam_names = tuple(sorted(set(examenes)))
+        self._exam_index = (exam_names, [exam.upper() for exam in exam_names])
+        self._exam_catalog = catalog
+    
+    @property
+    def exam_catalog(self) -> dict:
+        """Catálogo de exámenes (se lee del disco la primera vez que se usa)"""
+        if self._exam_catalog is None:
+            self.set_exam_catalog(self.load_exam_catalog())
+        return self._exam_catalog
+    
+    @property
+    def exam_index(self) -> tuple:
+        """Lista ordenada de exámenes del catálogo y su versión en mayúsculas"""
+        if self._exam_catalog is None:
+            self.set_exam_catalog(self.load_exam_catalog())
+        return self._exam_index
+    
+    def save_exam_catalog(self, examenes: list) -> dict:
+        """Guarda el catálogo de exámenes y lo devuelve"""
+        catalog_file = self.base_dir / self.get_setting("Archivos", "ArchivoCatalogo")
         catalog = {
             "examenes": examenes,
             "ultima_actualizacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-        with open(catalog_file, 'w', encoding='utf-8') as f:
-            json.dump(catalog, f, indent=2, ensure_ascii=False)
+        save_json_file(catalog_file, catalog)
+        self.save_catalog_meta(catalog_file, catalog)
+        return catalog
+    
+    def save_catalog_meta(self, catalog_file: Path, catalog: dict) -> dict:
+        """Guarda el resumen del catálogo, ligado a la fecha de modificación del catálogo"""
+        meta = summarize_exam_catalog(catalog)
+        meta["catalogo_mtime_ns"] = catalog_file.stat().st_mtime_ns
+        save_json_file(catalog_meta_file(catalog_file), meta)
+        return meta
+    
+    def load_catalog_meta(self) -> dict:
+        """Resumen del catálogo sin leer el catálogo completo.
+        
+        Si el resumen falta o no corresponde al catálogo actual (p. ej. editado
+        a mano), se lee el catálogo una vez y se regenera.
+        """
+        catalog_file = self.base_dir / self.get_setting("Archivos", "ArchivoCatalogo")
+        try:
+            mtime_ns = catalog_file.stat().st_mtime_ns
+        except OSError:
+            return summarize_exam_catalog({})
+        
+        try:
+            meta = load_json_file(catalog_meta_file(catalog_file))
+            if meta.get("catalogo_mtime_ns") == mtime_ns:
+                return meta
+        except Exception:
+            pass
+        
+        try:
+            return self.save_catalog_meta(catalog_file, self.exam_catalog)
+        except OSError:
+            return summarize_exam_catalog(self.exam_catalog)
     
     def create_notebook(self):
         """Crea el notebook con pestañas"""
@@ -313,6 +782,24 @@ class EstadisticaHospitalApp:
         self.notebook.add(self.config_frame, text="  Configuración Web  ")
         self.notebook.add(self.exams_frame, text="  Multiplicadores  ")
         self.notebook.add(self.categories_frame, text="  Categorías  ")
+        
+        # Pestañas pendientes de construir, indexadas por el nombre Tk del frame
+        self.pending_tabs = {
+            str(self.config_frame): self.create_config_tab,
+            str(self.exams_frame): self.create_exams_tab,
+            str(self.categories_frame): self.create_categories_tab,
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+    
+    def on_tab_changed(self, event=None):
+        """Construye la pestaña seleccionada la primera vez que se abre"""
+        selected = self.notebook.select()
+        builder = self.pending_tabs.pop(selected, None)
+        if builder:
+            builder()
+        
+        if selected == str(self.main_frame) and not self.is_running:
+            self.refresh_excel_button_state()
     
     def create_main_tab(self):
         """Crea la pestaña principal de descarga"""
@@ -330,11 +817,11 @@ class EstadisticaHospitalApp:
         
         if HAS_TKCALENDAR:
             self.start_date_entry = DateEntry(params_frame, width=15, date_pattern='yyyy-mm-dd',
-                                              font=("Segoe UI", 11), year=first_day.year,
+                                              font=self.font_normal, year=first_day.year,
                                               month=first_day.month, day=first_day.day)
             self.start_date_entry.grid(row=0, column=1, sticky="w", padx=5, pady=8)
         else:
-            self.start_date_var = tk.StringVar(value=first_day.strftime('%Y-%m-%d'))
+            self.start_date_var = tk.StringVar(value=first_day.isoformat())
             start_entry = ttk.Entry(params_frame, textvariable=self.start_date_var, width=15)
             start_entry.grid(row=0, column=1, sticky="w", padx=5, pady=8)
             ttk.Button(params_frame, text="📅", width=3, 
@@ -345,11 +832,11 @@ class EstadisticaHospitalApp:
         
         if HAS_TKCALENDAR:
             self.end_date_entry = DateEntry(params_frame, width=15, date_pattern='yyyy-mm-dd',
-                                            font=("Segoe UI", 11), year=yesterday.year,
+                                            font=self.font_normal, year=yesterday.year,
                                             month=yesterday.month, day=yesterday.day)
             self.end_date_entry.grid(row=0, column=4, sticky="w", padx=5, pady=8)
         else:
-            self.end_date_var = tk.StringVar(value=yesterday.strftime('%Y-%m-%d'))
+            self.end_date_var = tk.StringVar(value=yesterday.isoformat())
             end_entry = ttk.Entry(params_frame, textvariable=self.end_date_var, width=15)
             end_entry.grid(row=0, column=4, sticky="w", padx=5, pady=8)
             ttk.Button(params_frame, text="📅", width=3,
@@ -365,10 +852,15 @@ class EstadisticaHospitalApp:
         ttk.Button(quick_frame, text="Ayer", command=self.set_today).pack(side="left", padx=2)
         
         # Headless mode
-        self.headless_var = tk.BooleanVar(value=self.config.get("General", "Headless", fallback="false").lower() == "true")
+        self.headless_var = tk.BooleanVar(value=self.get_setting("General", "Headless").lower() == "true")
         ttk.Checkbutton(params_frame, text="Modo oculto (sin ventana del navegador)", 
                        variable=self.headless_var).grid(row=2, column=0, columnspan=6, sticky="w", padx=5, pady=8)
         
+        # Volver a descargar días que ya tienen su archivo en la carpeta de descargas
+        self.force_refresh_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(params_frame, text="Volver a descargar días ya descargados", 
+                       variable=self.force_refresh_var).grid(row=3, column=0, columnspan=6, sticky="w", padx=5, pady=(0, 8))
+        
         # Frame de botones de descarga
         buttons_frame = ttk.Frame(self.main_frame)
         buttons_frame.pack(fill="x", padx=10, pady=10)
@@ -397,15 +889,17 @@ class EstadisticaHospitalApp:
         
         # Última actualización
         self.last_update_var = tk.StringVar()
-        self.update_last_update_label()
         ttk.Label(catalog_frame, textvariable=self.last_update_var, 
-                 font=("Segoe UI", 10, "italic")).pack(side="left", padx=20)
+                 font=self.font_italic).pack(side="left", padx=20)
         
         # Info del catálogo
         self.catalog_info_var = tk.StringVar()
-        self.update_catalog_info()
         ttk.Label(catalog_frame, textvariable=self.catalog_info_var).pack(side="left", padx=10)
         
+        # Las etiquetas usan solo el resumen del catálogo; el catálogo completo
+        # se lee cuando lo necesita otra pestaña
+        self.root.after_idle(self.update_catalog_labels)
+        
         # Barra de progreso
         progress_frame = ttk.Frame(self.main_frame)
         progress_frame.pack(fill="x", padx=10, pady=5)
@@ -421,7 +915,7 @@ class EstadisticaHospitalApp:
         log_frame = ttk.LabelFrame(self.main_frame, text="Registro de Actividad", padding=5)
         log_frame.pack(fill="both", expand=True, padx=10, pady=5)
         
-        self.log_text = scrolledtext.ScrolledText(log_frame, height=12, font=("Consolas", 10))
+        self.log_text = scrolledtext.ScrolledText(log_frame, height=12, font=self.font_log)
         self.log_text.pack(fill="both", expand=True)
     
     def get_start_date(self) -> date:
@@ -429,14 +923,14 @@ class EstadisticaHospitalApp:
         if HAS_TKCALENDAR:
             return self.start_date_entry.get_date()
         else:
-            return datetime.strptime(self.start_date_var.get(), '%Y-%m-%d').date()
+            return date.fromisoformat(self.start_date_var.get())
     
     def get_end_date(self) -> date:
         """Obtiene la fecha final seleccionada"""
         if HAS_TKCALENDAR:
             return self.end_date_entry.get_date()
         else:
-            return datetime.strptime(self.end_date_var.get(), '%Y-%m-%d').date()
+            return date.fromisoformat(self.end_date_var.get())
     
     def set_date(self, start: date, end: date):
         """Establece las fechas en los selectores"""
@@ -444,8 +938,8 @@ class EstadisticaHospitalApp:
             self.start_date_entry.set_date(start)
             self.end_date_entry.set_date(end)
         else:
-            self.start_date_var.set(start.strftime('%Y-%m-%d'))
-            self.end_date_var.set(end.strftime('%Y-%m-%d'))
+            self.start_date_var.set(start.isoformat())
+            self.end_date_var.set(end.isoformat())
     
     def set_this_month(self):
         """Establece las fechas para el mes actual (hasta ayer)"""
@@ -480,7 +974,7 @@ class EstadisticaHospitalApp:
         
         # Parse current date
         try:
-            current = datetime.strptime(date_var.get(), '%Y-%m-%d').date()
+            current = date.fromisoformat(date_var.get())
         except:
             current = date.today()
         
@@ -506,30 +1000,29 @@ class EstadisticaHospitalApp:
         def apply_date():
             try:
                 new_date = date(int(year_var.get()), int(month_var.get()), int(day_var.get()))
-                date_var.set(new_date.strftime('%Y-%m-%d'))
+                date_var.set(new_date.isoformat())
                 popup.destroy()
             except ValueError as e:
                 messagebox.showerror("Error", f"Fecha inválida: {e}")
         
         ttk.Button(frame, text="Aceptar", command=apply_date).grid(row=3, column=0, columnspan=2, pady=10)
     
-    def update_last_update_label(self):
-        """Actualiza la etiqueta de última actualización"""
-        ultima = self.exam_catalog.get("ultima_actualizacion")
+    def update_catalog_labels(self):
+        """Actualiza las etiquetas de última actualización e información del catálogo"""
+        meta = self.load_catalog_meta()
+        
+        ultima = meta.get("ultima_actualizacion")
         if ultima:
             self.last_update_var.set(f"Última actualización: {ultima}")
         else:
             self.last_update_var.set("Catálogo no descargado")
-    
-    def update_catalog_info(self):
-        """Actualiza la información del catálogo"""
-        examenes = self.exam_catalog.get("examenes", {})
-        if isinstance(examenes, dict):
-            total = sum(len(exams) for exams in examenes.values())
-            secciones = len(examenes)
+        
+        total = meta.get("examenes")
+        secciones = meta.get("secciones")
+        if total is not None and secciones is not None:
             self.catalog_info_var.set(f"({total} exámenes en {secciones} secciones)")
-        elif isinstance(examenes, list):
-            self.catalog_info_var.set(f"({len(examenes)} exámenes)")
+        elif total is not None:
+            self.catalog_info_var.set(f"({total} exámenes)")
         else:
             self.catalog_info_var.set("")
     
@@ -551,79 +1044,34 @@ class EstadisticaHospitalApp:
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
-        # Bind mouse wheel
+        # Rueda del ratón solo mientras el puntero está sobre esta pestaña, para no
+        # interceptar el scroll del log, las tablas o los desplegables
         def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        canvas.bind_all("<MouseWheel>", _on_mousewheel)
-        
-        # Frame de URL y navegación
-        web_frame = ttk.LabelFrame(scrollable_frame, text="Configuración del Sitio Web", padding=10)
-        web_frame.pack(fill="x", padx=10, pady=5)
-        
-        ttk.Label(web_frame, text="URL del sitio:").grid(row=0, column=0, sticky="w", padx=5, pady=2)
-        self.url_var = tk.StringVar(value=self.config.get("General", "URL"))
-        ttk.Entry(web_frame, textvariable=self.url_var, width=60).grid(row=0, column=1, sticky="ew", padx=5, pady=2)
-        
-        # Frame de elementos del formulario
-        form_frame = ttk.LabelFrame(scrollable_frame, text="Elementos del Formulario (IDs HTML)", padding=10)
-        form_frame.pack(fill="x", padx=10, pady=5)
-        
-        ttk.Label(form_frame, text="ID Dropdown Agrupar:").grid(row=0, column=0, sticky="w", padx=5, pady=2)
-        self.dropdown_id_var = tk.StringVar(value=self.config.get("Informe", "IdDropdownAgrupar"))
-        ttk.Entry(form_frame, textvariable=self.dropdown_id_var, width=30).grid(row=0, column=1, sticky="w", padx=5, pady=2)
-        
-        ttk.Label(form_frame, text="Valor a seleccionar:").grid(row=1, column=0, sticky="w", padx=5, pady=2)
-        self.dropdown_value_var = tk.StringVar(value=self.config.get("Informe", "ValorAgrupacion"))
-        ttk.Entry(form_frame, textvariable=self.dropdown_value_var, width=30).grid(row=1, column=1, sticky="w", padx=5, pady=2)
-        
-        ttk.Label(form_frame, text="ID Campo Fecha Desde:").grid(row=2, column=0, sticky="w", padx=5, pady=2)
-        self.fecha_desde_var = tk.StringVar(value=self.config.get("Informe", "IdFechaDesde"))
-        ttk.Entry(form_frame, textvariable=self.fecha_desde_var, width=30).grid(row=2, column=1, sticky="w", padx=5, pady=2)
-        
-        ttk.Label(form_frame, text="ID Campo Fecha Hasta:").grid(row=3, column=0, sticky="w", padx=5, pady=2)
-        self.fecha_hasta_var = tk.StringVar(value=self.config.get("Informe", "IdFechaHasta"))
-        ttk.Entry(form_frame, textvariable=self.fecha_hasta_var, width=30).grid(row=3, column=1, sticky="w", padx=5, pady=2)
-        
-        # Frame de archivos
-        files_frame = ttk.LabelFrame(scrollable_frame, text="Rutas de Archivos", padding=10)
-        files_frame.pack(fill="x", padx=10, pady=5)
-        
-        ttk.Label(files_frame, text="Carpeta de descargas:").grid(row=0, column=0, sticky="w", padx=5, pady=2)
-        self.downloads_folder_var = tk.StringVar(value=self.config.get("Archivos", "CarpetaDescargas"))
-        ttk.Entry(files_frame, textvariable=self.downloads_folder_var, width=40).grid(row=0, column=1, sticky="w", padx=5, pady=2)
-        
-        ttk.Label(files_frame, text="Archivo de salida:").grid(row=1, column=0, sticky="w", padx=5, pady=2)
-        self.output_file_var = tk.StringVar(value=self.config.get("Archivos", "ArchivoSalida"))
-        ttk.Entry(files_frame, textvariable=self.output_file_var, width=40).grid(row=1, column=1, sticky="w", padx=5, pady=2)
-        
-        # Frame de columnas merge
-        merge_frame = ttk.LabelFrame(scrollable_frame, text="Columnas a Combinar en Estadística Calculada", padding=10)
-        merge_frame.pack(fill="x", padx=10, pady=5)
-        
+            canvas.yview_scroll(-(event.delta // 120) or (-1 if event.delta > 0 else 1), "units")
+        canvas.bind("<Enter>", lambda e: canvas.bind_all("<MouseWheel>", _on_mousewheel))
+        canvas.bind("<Leave>", lambda e: canvas.unbind_all("<MouseWheel>"))
+        
+        # Marcos con sus campos (etiqueta + entrada) según CONFIG_TAB_FIELDS
+        for title, first_row, fields in self.CONFIG_TAB_FIELDS:
+            frame = ttk.LabelFrame(scrollable_frame, text=title, padding=10)
+            frame.pack(fill="x", padx=10, pady=5)
+            
+            for row, (label, attr, section, key, width) in enumerate(fields, start=first_row):
+                var = tk.StringVar(value=self.get_setting(section, key))
+                setattr(self, attr, var)
+                ttk.Label(frame, text=label).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+                ttk.Entry(frame, textvariable=var, width=width).grid(row=row, column=1, sticky="w", padx=5, pady=2)
+        
+        # El último marco es el de columnas merge: agregar las indicaciones
+        merge_frame = frame
         ttk.Label(merge_frame, text="Las columnas se combinan sumándolas. Separe con comas.",
-                 font=("", 9, "italic")).grid(row=0, column=0, columnspan=2, sticky="w", padx=5, pady=2)
-        
-        ttk.Label(merge_frame, text="Hospitalización Total =").grid(row=1, column=0, sticky="w", padx=5, pady=2)
-        self.hosp_total_var = tk.StringVar(value=self.config.get("ColumnasMerge", "HospitalizacionTotal", 
-                                           fallback="Hospitalización,URGENTE HOSPITALIZACION"))
-        ttk.Entry(merge_frame, textvariable=self.hosp_total_var, width=50).grid(row=1, column=1, sticky="w", padx=5, pady=2)
-        
-        ttk.Label(merge_frame, text="Consulta Externa Total =").grid(row=2, column=0, sticky="w", padx=5, pady=2)
-        self.cons_total_var = tk.StringVar(value=self.config.get("ColumnasMerge", "ConsultaExternaTotal",
-                                           fallback="Consulta Externa,URGENTE CONSULTA EXTERNA,REFERENCIA,URGENTE REFERENCIA"))
-        ttk.Entry(merge_frame, textvariable=self.cons_total_var, width=50).grid(row=2, column=1, sticky="w", padx=5, pady=2)
-        
-        ttk.Label(merge_frame, text="Emergencia =").grid(row=3, column=0, sticky="w", padx=5, pady=2)
-        self.emerg_var = tk.StringVar(value=self.config.get("ColumnasMerge", "Emergencia",
-                                      fallback="Emergencia,Sin tipo atención"))
-        ttk.Entry(merge_frame, textvariable=self.emerg_var, width=50).grid(row=3, column=1, sticky="w", padx=5, pady=2)
+                 font=self.font_small_italic).grid(row=0, column=0, columnspan=2, sticky="w", padx=5, pady=2)
         
         # Info sobre columnas disponibles
         ttk.Label(merge_frame, text="Columnas disponibles en los datos descargados:",
-                 font=("", 9)).grid(row=4, column=0, columnspan=2, sticky="w", padx=5, pady=(10, 2))
-        available_cols = "REFERENCIA, Hospitalización, Emergencia, URGENTE CONSULTA EXTERNA, " \
-                        "Consulta Externa, Sin tipo atención, URGENTE REFERENCIA, URGENTE HOSPITALIZACION, Total"
-        ttk.Label(merge_frame, text=available_cols, font=("", 8, "italic"), 
+                 font=self.font_small).grid(row=4, column=0, columnspan=2, sticky="w", padx=5, pady=(10, 2))
+        available_cols = ", ".join(NUMERIC_COLUMNS)
+        ttk.Label(merge_frame, text=available_cols, font=self.font_tiny_italic, 
                  wraplength=500).grid(row=5, column=0, columnspan=2, sticky="w", padx=5, pady=2)
         
         # Botón guardar
@@ -661,7 +1109,7 @@ class EstadisticaHospitalApp:
         self.mult_tree.column("multiplier", width=100)
         
         scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.mult_tree.yview)
-        self.mult_tree.configure(yscrollcommand=scrollbar.set)
+        self.bind_lazy_scroll(self.mult_tree, scrollbar)
         
         self.mult_tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -677,6 +1125,7 @@ class EstadisticaHospitalApp:
         ttk.Label(edit_frame, text="Examen:").grid(row=0, column=0, sticky="w", padx=5, pady=2)
         self.new_exam_var = tk.StringVar()
         self.exam_combobox = ttk.Combobox(edit_frame, textvariable=self.new_exam_var, width=50)
+        self.exam_combo_values = ()
         self.exam_combobox.grid(row=0, column=1, sticky="w", padx=5, pady=2)
         
         # Poblar combobox con catálogo
@@ -699,54 +1148,90 @@ class EstadisticaHospitalApp:
     
     def update_exam_combobox(self):
         """Actualiza el combobox con la lista de exámenes del catálogo"""
-        examenes_dict = self.exam_catalog.get("examenes", {})
-        
-        # Handle both old format (list) and new format (dict by section)
-        if isinstance(examenes_dict, list):
-            examenes = examenes_dict
-        else:
-            # Flatten dict to list
-            examenes = []
-            for section_exams in examenes_dict.values():
-                examenes.extend(section_exams)
-            examenes = sorted(set(examenes))
+        if not hasattr(self, "exam_combobox"):
+            return  # La pestaña Multiplicadores aún no se ha construido
         
-        self.exam_combobox['values'] = examenes
+        self.set_exam_combobox_values(self.exam_index[0])
+    
+    def set_exam_combobox_values(self, values: tuple):
+        """Asigna los valores del combobox solo si cambiaron (evita reenviar la lista a Tk)"""
+        if values == self.exam_combo_values:
+            return
+        self.exam_combo_values = values
+        self.exam_combobox['values'] = values
     
     def filter_exam_combobox(self, event):
         """Filtra el combobox con búsqueda fuzzy"""
         typed = self.new_exam_var.get().upper()
-        if not typed:
+        if len(typed) < 2:
             self.update_exam_combobox()
             return
         
-        examenes_dict = self.exam_catalog.get("examenes", {})
-        
-        # Handle both formats
-        if isinstance(examenes_dict, list):
-            examenes = examenes_dict
-        else:
-            examenes = []
-            for section_exams in examenes_dict.values():
-                examenes.extend(section_exams)
-        
-        # Filtro fuzzy: buscar exámenes que contengan las palabras escritas
-        words = typed.split()
-        filtered = []
-        for exam in examenes:
-            exam_upper = exam.upper()
-            if all(word in exam_upper for word in words):
-                filtered.append(exam)
+        # Filtro fuzzy: un único regex compilado con un lookahead por palabra
+        # (todas deben aparecer, en cualquier orden) sobre la lista precalculada
+        exam_names, exam_names_upper = self.exam_index
+        pattern = re.compile("".join(f"(?=.*{re.escape(word)})" for word in typed.split()), re.DOTALL)
+        matches = (exam for exam, exam_upper in zip(exam_names, exam_names_upper)
+                   if pattern.match(exam_upper))
         
-        # Eliminar duplicados y ordenar
-        filtered = sorted(set(filtered))
+        # La lista ya está ordenada: basta con los 20 primeros resultados
+        filtered = tuple(itertools.islice(matches, 20))
         
-        self.exam_combobox['values'] = filtered[:20]  # Limitar a 20 resultados
+        self.set_exam_combobox_values(filtered)
         
         # Mostrar dropdown si hay resultados
-        if filtered and len(typed) >= 2:
+        if filtered:
             self.exam_combobox.event_generate('<Down>')
     
+    def bind_lazy_scroll(self, tree, scrollbar):
+        """Conecta el scrollbar al Treeview cargando más filas al acercarse al final"""
+        key = str(tree)
+        
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            # Una sola carga programada por Treeview aunque lleguen varios eventos seguidos
+            if float(last) > 0.9 and key in self.tree_pending and key not in self.tree_page_scheduled:
+                self.tree_page_scheduled.add(key)
+                self.root.after_idle(self.load_scheduled_tree_page, tree)
+        tree.configure(yscrollcommand=on_scroll)
+    
+    def load_scheduled_tree_page(self, tree):
+        """Carga la página programada desde el scroll del Treeview"""
+        self.tree_page_scheduled.discard(str(tree))
+        self.load_tree_page(tree)
+    
+    def populate_tree(self, tree, rows):
+        """Reemplaza el contenido del Treeview, insertando solo la primera página de filas"""
+        tree.delete(*tree.get_children())
+        self.tree_pending[str(tree)] = [list(rows), 0]
+        self.load_tree_page(tree)
+    
+    def load_tree_page(self, tree):
+        """Inserta la siguiente página de filas pendientes del Treeview"""
+        pending = self.tree_pending.get(str(tree))
+        if pending is None:
+            return
+        
+        rows, start = pending
+        end = start + TREE_PAGE_SIZE
+        
+        # Toda la página en una sola llamada: el bucle corre dentro de Tcl y
+        # tkinter convierte las tuplas en listas Tcl (sin escapar a mano)
+        tree.tk.call("apply", TREE_BULK_INSERT_TCL, str(tree), tuple(rows[start:end]))
+        
+        if end >= len(rows):
+            del self.tree_pending[str(tree)]
+        else:
+            pending[1] = end
+    
+    def append_tree_row(self, tree, values):
+        """Agrega una fila al final del Treeview respetando las filas aún pendientes"""
+        pending = self.tree_pending.get(str(tree))
+        if pending is not None:
+            pending[0].append(values)
+        else:
+            tree.insert("", "end", values=values)
+    
     def create_categories_tab(self):
         """Crea la pestaña de categorías"""
         # Notebook interno para subcategorías
@@ -782,7 +1267,7 @@ class EstadisticaHospitalApp:
         tree.column("category", width=150)
         
         scrollbar = ttk.Scrollbar(parent, orient="vertical", command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
+        self.bind_lazy_scroll(tree, scrollbar)
         
         tree.pack(side="top", fill="both", expand=True, padx=10, pady=5)
         scrollbar.place(relx=0.98, rely=0, relheight=0.8, anchor="ne")
@@ -790,12 +1275,10 @@ class EstadisticaHospitalApp:
         # Cargar datos
         if cat_type == "exam":
             self.exam_cat_tree = tree
-            for name, cat in self.exam_config.get("exam_categories", {}).items():
-                tree.insert("", "end", values=(name, cat))
+            self.populate_tree(tree, self.exam_config.get("exam_categories", {}).items())
         else:
             self.section_cat_tree = tree
-            for name, cat in self.exam_config.get("seccion_categories", {}).items():
-                tree.insert("", "end", values=(name, cat))
+            self.populate_tree(tree, self.exam_config.get("seccion_categories", {}).items())
         
         # Frame de edición
         edit_frame = ttk.Frame(parent)
@@ -850,7 +1333,7 @@ class EstadisticaHospitalApp:
         self.uncat_tree.column("section", width=200)
         
         scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.uncat_tree.yview)
-        self.uncat_tree.configure(yscrollcommand=scrollbar.set)
+        self.bind_lazy_scroll(self.uncat_tree, scrollbar)
         
         self.uncat_tree.pack(side="top", fill="both", expand=True, padx=10, pady=5)
         scrollbar.place(relx=0.98, rely=0.15, relheight=0.6, anchor="ne")
@@ -867,269 +1350,296 @@ class EstadisticaHospitalApp:
         ttk.Button(add_frame, text="➕ Agregar a Categorías por Examen", 
                   command=self.add_uncategorized_to_exam).pack(side="left", padx=5)
     
-    def update_last_update_label(self):
-        """Actualiza la etiqueta de última actualización"""
-        ultima = self.exam_catalog.get("ultima_actualizacion")
-        if ultima:
-            self.last_update_var.set(f"Última actualización: {ultima}")
-        else:
-            self.last_update_var.set("Catálogo no descargado")
-    
     def show_uncategorized(self):
         """Muestra los exámenes sin categorizar"""
         # Limpiar lista
-        for item in self.uncat_tree.get_children():
-            self.uncat_tree.delete(item)
+        self.populate_tree(self.uncat_tree, ())
         
         examenes_dict = self.exam_catalog.get("examenes", {})
         
         # Handle both old format (list) and new format (dict by section)
         if isinstance(examenes_dict, list):
             # Old format - just a list of exam names
-            examenes_con_seccion = [(exam, "") for exam in examenes_dict]
+            examenes_por_seccion = {"": examenes_dict}
         else:
             # New format - dict with section -> [exams]
-            examenes_con_seccion = []
-            for seccion, exams in examenes_dict.items():
-                for exam in exams:
-                    examenes_con_seccion.append((exam, seccion))
+            examenes_por_seccion = examenes_dict
         
-        if not examenes_con_seccion:
+        total = sum(map(len, examenes_por_seccion.values()))
+        if not total:
             messagebox.showinfo("Info", "No hay exámenes en el catálogo.\nHaga clic en 'Actualizar Catálogo de Exámenes' en la pestaña Descarga.")
             return
         
-        # Obtener categorías configuradas
-        exam_categories = self.exam_config.get("exam_categories", {})
-        seccion_categories = self.exam_config.get("seccion_categories", {})
-        
-        # Encontrar sin categorizar
-        uncategorized = []
-        for exam, seccion in examenes_con_seccion:
-            # Check if exam has category directly
-            if exam in exam_categories:
-                continue
-            # Check if section has category
-            if seccion and seccion in seccion_categories:
-                continue
-            uncategorized.append((exam, seccion))
-        
-        # Ordenar alfabéticamente
-        uncategorized.sort(key=lambda x: x[0])
+        # Reutilizar el resultado si ni el catálogo ni las categorías cambiaron
+        cache = self.uncategorized_cache
+        if cache and cache[0] is self.exam_catalog and cache[1] == self.categories_version:
+            uncategorized = cache[2]
+        else:
+            # Obtener categorías configuradas (dict_keys: pertenencia O(1)). Con
+            # cadenas, np.isin/Index.isin resultan más lentos: hay que construir
+            # los arreglos y ordenar objetos, frente a una búsqueda hash por examen
+            exam_categories = self.exam_config.get("exam_categories", {}).keys()
+            seccion_categories = self.exam_config.get("seccion_categories", {}).keys()
+            
+            # Encontrar sin categorizar: las secciones con categoría se descartan completas
+            # y se ordena alfabéticamente sin construir la lista intermedia de todos los exámenes
+            uncategorized = sorted(
+                ((exam, seccion)
+                 for seccion, exams in examenes_por_seccion.items()
+                 if not (seccion and seccion in seccion_categories)
+                 for exam in exams
+                 if exam not in exam_categories),
+                key=operator.itemgetter(0))
+            self.uncategorized_cache = (self.exam_catalog, self.categories_version, uncategorized)
         
         # Agregar a la lista
-        for exam, seccion in uncategorized:
-            self.uncat_tree.insert("", "end", values=(exam, seccion))
+        self.populate_tree(self.uncat_tree, uncategorized)
         
         if not uncategorized:
-            total = len(examenes_con_seccion)
             messagebox.showinfo("Completo", f"Todos los {total} exámenes tienen categoría asignada")
         else:
-            total = len(examenes_con_seccion)
             messagebox.showinfo("Resultado", f"Se encontraron {len(uncategorized)} exámenes sin categorizar de {total} totales")
     
     def update_exam_catalog(self):
         """Descarga el catálogo de exámenes del sistema"""
-        # Ejecutar en hilo separado
-        thread = threading.Thread(target=self._download_exam_catalog)
-        thread.daemon = True
-        thread.start()
+        if self.catalog_running:
+            return
+        if self.is_running:
+            # Ambos procesos usan el mismo perfil de Chrome (browser_data)
+            messagebox.showwarning("Aviso", "Espere a que termine la descarga de datos antes de actualizar el catálogo.")
+            return
+        
+        # Ejecutar en el hilo del navegador del catálogo
+        self.catalog_running = True
+        self.run_in_catalog_thread(self.run_catalog_download)
+    
+    def run_catalog_download(self):
+        """Descarga el catálogo y libera el indicador de ejecución al terminar"""
+        try:
+            self._download_exam_catalog()
+        finally:
+            self.catalog_running = False
+    
+    def run_in_catalog_thread(self, func) -> threading.Event:
+        """Encola func en el hilo dedicado del catálogo, dueño del navegador reutilizable"""
+        if self.catalog_thread is None:
+            self.catalog_thread = threading.Thread(target=self.catalog_worker, daemon=True)
+            self.catalog_thread.start()
+        
+        done = threading.Event()
+        self.catalog_jobs.put((func, done))
+        return done
+    
+    def catalog_worker(self):
+        """Bucle del hilo del catálogo: Playwright (sync) solo puede usarse desde un mismo hilo"""
+        while True:
+            func, done = self.catalog_jobs.get()
+            try:
+                func()
+            except Exception as e:
+                self.log(f"❌ Error: {str(e)}")
+            finally:
+                done.set()
+    
+    @contextlib.contextmanager
+    def catalog_browser(self, user_data_dir: Path):
+        """Entrega el navegador del catálogo, que se mantiene abierto entre descargas"""
+        if self.catalog_context is None:
+            if self.catalog_playwright is None:
+                self.catalog_playwright = sync_playwright().start()
+            
+            context = self.catalog_playwright.chromium.launch_persistent_context(
+                user_data_dir=str(user_data_dir),
+                headless=False,
+                channel="chrome",
+                accept_downloads=True
+            )
+            
+            # Si el usuario cierra la ventana, la próxima descarga abre otra
+            def on_close(_):
+                if self.catalog_context is context:
+                    self.catalog_context = None
+            context.on("close", on_close)
+            self.catalog_context = context
+        
+        try:
+            yield self.catalog_context
+        except BaseException:
+            # No reutilizar un navegador que quedó en un estado desconocido
+            self.close_catalog_browser()
+            raise
+    
+    def close_catalog_browser(self):
+        """Cierra el navegador del catálogo y Playwright (ejecutar en el hilo del catálogo)"""
+        context, self.catalog_context = self.catalog_context, None
+        if context is not None:
+            try:
+                context.close()
+            except Exception:
+                pass
+        
+        playwright, self.catalog_playwright = self.catalog_playwright, None
+        if playwright is not None:
+            try:
+                playwright.stop()
+            except Exception:
+                pass
+    
+    def release_catalog_browser(self, timeout: float = 10):
+        """Cierra el navegador del catálogo (si está abierto) desde el hilo de la interfaz"""
+        if self.catalog_context is not None or self.catalog_playwright is not None:
+            self.run_in_catalog_thread(self.close_catalog_browser).wait(timeout)
+    
+    def on_close(self):
+        """Cierra el navegador del catálogo antes de salir"""
+        self.release_catalog_browser(timeout=5)
+        self.root.destroy()
     
     def _download_exam_catalog(self):
         """Descarga el catálogo de exámenes por sección (ejecutar en hilo)"""
         try:
-            url = self.config.get("General", "URLCatalogo", fallback="https://hjmvi.orion-labs.com/informes/catalogos")
-            dropdown_id = self.config.get("Catalogo", "IdDropdownTipo", fallback="tipo")
-            dropdown_value = self.config.get("Catalogo", "ValorExamenes", fallback="EXAMENES")
-            button_id = self.config.get("Catalogo", "IdBotonGenerar", fallback="generar-informe-auditorias")
+            url = self.get_setting("General", "URLCatalogo")
+            dropdown_id = self.get_setting("Catalogo", "IdDropdownTipo")
+            dropdown_value = self.get_setting("Catalogo", "ValorExamenes")
+            button_id = self.get_setting("Catalogo", "IdBotonGenerar")
             
             browser_data_folder = self.base_dir / "browser_data"
             browser_data_folder.mkdir(exist_ok=True)
             
-            downloads_folder = self.base_dir / self.config.get("Archivos", "CarpetaDescargas")
-            downloads_folder.mkdir(exist_ok=True)
-            
             # Lista de secciones a descargar
-            secciones = [
-                "Autoinmunes e Infecciosas",
-                "Biología Molecular",
-                "Bioquímica",
-                "Citología",
-                "Coagulación",
-                "Coproanálisis",
-                "Drogas y Fármacos",
-                "Electrolitos",
-                "Especiales",
-                "Estudios de Alergias",
-                "Estudios Hormonales",
-                "Gases Arteriales",
-                "Hematología",
-                "Inmunohematología",
-                "Inmunología",
-                "Inmunoquímica Sanguínea",
-                "Líquidos Biológicos",
-                "Marcadores Coronarios",
-                "Marcadores Tumorales",
-                "Medicina Ocupacional",
-                "Microbiología",
-                "Plaquetas",
-                "Química Clínica en Orina",
-                "Serología",
-                "Uroanálisis"
-            ]
+            secciones = CATALOG_SECTIONS
             
-            self.root.after(0, lambda: self.log("🔄 Descargando catálogo de exámenes por sección..."))
-            self.root.after(0, lambda: self.status_var.set("Descargando catálogo de exámenes..."))
+            self.log("🔄 Descargando catálogo de exámenes por sección...")
+            self.update_progress(0, 1, "Descargando catálogo de exámenes...")
             
             examenes_por_seccion = {}
             
-            with sync_playwright() as p:
-                context = p.chromium.launch_persistent_context(
-                    user_data_dir=str(browser_data_folder),
-                    headless=False,
-                    channel="chrome",
-                    accept_downloads=True
-                )
-                
-                page = context.pages[0] if context.pages else context.new_page()
-                page.goto(url, timeout=60000)
-                
-                # Esperar a que cargue
-                page.wait_for_load_state("networkidle", timeout=10000)
+            # Los Excel de cada sección se procesan en segundo plano mientras el navegador
+            # descarga la siguiente; el pool se cierra también al salir antes o por error
+            with ThreadPoolExecutor(max_workers=2) as parse_pool:
+                parse_futures = {}
                 
-                # Verificar login - esperar a que aparezca el dropdown de tipo
-                max_wait = 120
-                waited = 0
-                while waited < max_wait:
+                with self.catalog_browser(browser_data_folder) as context:
+                    page = context.pages[0] if context.pages else context.new_page()
+                    page.goto(url, timeout=60000)
+                    
+                    # Esperar a que cargue
+                    page.wait_for_load_state("networkidle", timeout=10000)
+                    
+                    # Verificar login - esperar (hasta 2 min) a que aparezca el dropdown de tipo
+                    dropdown = page.locator(f"#{dropdown_id}")
                     try:
-                        dropdown = page.query_selector(f"#{dropdown_id}")
-                        if dropdown:
-                            break
-                    except:
-                        pass
-                    time.sleep(2)
-                    waited += 2
-                
-                if waited >= max_wait:
-                    self.root.after(0, lambda: messagebox.showerror("Error", "Timeout esperando la página. ¿Necesita iniciar sesión?"))
-                    context.close()
-                    return
-                
-                # Seleccionar "Exámenes" en el dropdown de Tipo
-                dropdown = page.query_selector(f"#{dropdown_id}")
-                if dropdown:
+                        dropdown.wait_for(state="attached", timeout=120000)
+                    except PlaywrightTimeout:
+                        self.call_in_ui(messagebox.showerror, "Error", "Timeout esperando la página. ¿Necesita iniciar sesión?")
+                        self.close_catalog_browser()
+                        return
+                    
+                    # Seleccionar "Exámenes" en el dropdown de Tipo
                     dropdown.select_option(value=dropdown_value)
                     time.sleep(1)
-                
-                total_secciones = len(secciones)
-                secciones_descargadas = 0
-                
-                for seccion in secciones:
-                    try:
-                        self.root.after(0, lambda s=seccion, i=secciones_descargadas, t=total_secciones: 
-                            self.status_var.set(f"Descargando {s} ({i+1}/{t})..."))
-                        self.root.after(0, lambda i=secciones_descargadas, t=total_secciones: 
-                            self.progress_var.set((i / t) * 100))
-                        
-                        # Hacer clic en el dropdown de secciones para abrirlo
-                        secciones_input = page.query_selector("#secciones input.vs__search")
-                        if secciones_input:
-                            secciones_input.click()
-                            time.sleep(0.5)
-                            
-                            # Escribir el nombre de la sección para filtrar
-                            secciones_input.fill(seccion)
-                            time.sleep(0.5)
-                            
-                            # Hacer clic en la opción que aparece
-                            option = page.query_selector(f".vs__dropdown-menu .vs__dropdown-option")
-                            if option:
-                                option.click()
-                                time.sleep(0.3)
-                        
-                        # Descargar
+                    
+                    total_secciones = len(secciones)
+                    secciones_descargadas = 0
+                    
+                    # Localizadores creados una vez y reutilizados en cada sección
+                    secciones_input = page.locator("#secciones input.vs__search")
+                    option_locator = page.locator(".vs__dropdown-menu .vs__dropdown-option").first
+                    generar_locator = page.locator(f"#{button_id}").or_(
+                        page.locator("button:has-text('Generar informe')")).first
+                    deselect_locator = page.locator("#secciones .vs__deselect")
+                    selected_locator = page.locator("#secciones .vs__selected").first
+                    
+                    for seccion in secciones:
                         try:
-                            with page.expect_download(timeout=15000) as download_info:
-                                generar_btn = page.query_selector(f"#{button_id}")
-                                if generar_btn:
-                                    generar_btn.click()
-                                else:
-                                    page.click("button:has-text('Generar informe')")
-                            
-                            download = download_info.value
-                            temp_path = downloads_folder / f"catalogo_{seccion.replace(' ', '_')}.xlsx"
-                            download.save_as(temp_path)
-                            
-                            # Leer el archivo Excel y extraer exámenes
-                            df = pd.read_excel(temp_path, skiprows=3)
+                            self.update_progress(secciones_descargadas, total_secciones,
+                                                 f"Descargando {seccion} ({secciones_descargadas + 1}/{total_secciones})...")
                             
-                            # Buscar la columna de exámenes
-                            exam_col = None
-                            for col in df.columns:
-                                if 'examen' in col.lower():
-                                    exam_col = col
-                                    break
+                            # Hacer clic en el dropdown de secciones para abrirlo
+                            selected = False
+                            if secciones_input.count():
+                                secciones_input.click()
+                                
+                                # Escribir el nombre de la sección para filtrar
+                                secciones_input.fill(seccion)
+                                
+                                # Esperar a que el filtro muestre la sección y hacer clic en la opción
+                                try:
+                                    option_locator.filter(has_text=seccion).wait_for(state="visible", timeout=3000)
+                                    option_locator.click()
+                                    selected_locator.wait_for(state="attached", timeout=2000)
+                                    selected = True
+                                except PlaywrightTimeout:
+                                    pass
                             
-                            if exam_col is None and len(df.columns) > 0:
-                                exam_col = df.columns[0]
+                            # Sin la sección seleccionada el informe saldría sin filtro (o con
+                            # otra sección): no se genera y se pasa a la siguiente
+                            if not selected:
+                                self.log(f"   ⚠️ {seccion}: no se pudo seleccionar")
+                            else:
+                                # Descargar (botón por id o, si no existe, por su texto)
+                                try:
+                                    with page.expect_download(timeout=15000) as download_info:
+                                        generar_locator.click()
+                                    
+                                    # Se toma el archivo que ya guardó el navegador, sin copiarlo
+                                    # a la carpeta de descargas ni borrarlo después
+                                    download = download_info.value
+                                    content = Path(download.path()).read_bytes()
+                                    
+                                    # Leer el archivo Excel y extraer exámenes (en segundo plano)
+                                    parse_futures[seccion] = parse_pool.submit(read_catalog_section, content)
+                                    
+                                except Exception as e:
+                                    self.log(f"   ⚠️ {seccion}: Error - {e}")
                             
-                            if exam_col:
-                                examenes = df[exam_col].dropna().astype(str).tolist()
-                                examenes = [e.strip() for e in examenes 
-                                           if e.strip() and not e.startswith('Hospital') and not e.startswith('Generado')]
-                                examenes_por_seccion[seccion] = examenes
-                                self.root.after(0, lambda s=seccion, n=len(examenes): 
-                                    self.log(f"   ✅ {s}: {n} exámenes"))
-                            
-                            # Eliminar archivo temporal
+                            # Limpiar la selección de sección para la siguiente iteración
+                            # (también si quedó a medias al fallar la selección)
+                            # Hacer clic en los botones X (todos en una sola llamada al navegador)
                             try:
-                                temp_path.unlink()
+                                deselect_locator.evaluate_all("els => els.forEach(el => el.click())")
+                                page.wait_for_function(
+                                    "() => document.querySelectorAll('#secciones .vs__selected').length === 0",
+                                    timeout=2000)
                             except:
                                 pass
                             
+                            secciones_descargadas += 1
+                            
                         except Exception as e:
-                            self.root.after(0, lambda s=seccion, err=str(e): 
-                                self.log(f"   ⚠️ {s}: Error - {err}"))
-                        
-                        # Limpiar la selección de sección para la siguiente iteración
-                        # Hacer clic en el botón X para deseleccionar
-                        deselect_btns = page.query_selector_all("#secciones .vs__deselect")
-                        for btn in deselect_btns:
-                            try:
-                                btn.click()
-                                time.sleep(0.2)
-                            except:
-                                pass
-                        
-                        secciones_descargadas += 1
-                        
+                            self.log(f"   ❌ {seccion}: Error - {e}")
+                            continue
+                
+                # Recoger los exámenes en el orden de las secciones
+                for seccion, future in parse_futures.items():
+                    try:
+                        examenes = future.result()
                     except Exception as e:
-                        self.root.after(0, lambda s=seccion, err=str(e): 
-                            self.log(f"   ❌ {s}: Error - {err}"))
+                        self.log(f"   ⚠️ {seccion}: Error - {e}")
                         continue
-                
-                context.close()
+                    if examenes is not None:
+                        examenes_por_seccion[seccion] = examenes
+                        self.log(f"   ✅ {seccion}: {len(examenes)} exámenes")
             
             # Guardar catálogo con estructura por sección
-            self.save_exam_catalog(examenes_por_seccion)
-            self.exam_catalog = self.load_exam_catalog()
+            # El catálogo recién guardado se usa directamente, sin releerlo del disco
+            self.set_exam_catalog(self.save_exam_catalog(examenes_por_seccion))
             
             # Contar total de exámenes
             total_examenes = sum(len(exams) for exams in examenes_por_seccion.values())
             
             # Actualizar UI
-            self.root.after(0, self.update_last_update_label)
-            self.root.after(0, self.update_exam_combobox)
-            self.root.after(0, self.update_catalog_info)
-            self.root.after(0, lambda: self.progress_var.set(100))
-            self.root.after(0, lambda: self.status_var.set("Catálogo actualizado"))
+            self.call_in_ui(self.update_catalog_labels)
+            self.call_in_ui(self.update_exam_combobox)
+            self.update_progress(1, 1, "Catálogo actualizado")
             
-            self.root.after(0, lambda: self.log(f"✅ Catálogo actualizado: {total_examenes} exámenes en {len(examenes_por_seccion)} secciones"))
-            self.root.after(0, lambda: messagebox.showinfo("Completado", 
-                f"Catálogo actualizado:\n{total_examenes} exámenes en {len(examenes_por_seccion)} secciones"))
+            self.log(f"✅ Catálogo actualizado: {total_examenes} exámenes en {len(examenes_por_seccion)} secciones")
+            self.call_in_ui(messagebox.showinfo, "Completado",
+                f"Catálogo actualizado:\n{total_examenes} exámenes en {len(examenes_por_seccion)} secciones")
             
         except Exception as e:
-            self.root.after(0, lambda: self.log(f"❌ Error: {str(e)}"))
-            self.root.after(0, lambda: messagebox.showerror("Error", f"Error descargando catálogo: {str(e)}"))
+            self.log(f"❌ Error: {str(e)}")
+            self.call_in_ui(messagebox.showerror, "Error", f"Error descargando catálogo: {str(e)}")
     
     # ============================================
     # FUNCIONES DE CONFIGURACIÓN
@@ -1137,31 +1647,18 @@ class EstadisticaHospitalApp:
     
     def save_web_config(self):
         """Guarda la configuración web"""
-        self.config.set("General", "URL", self.url_var.get())
-        self.config.set("Informe", "IdDropdownAgrupar", self.dropdown_id_var.get())
-        self.config.set("Informe", "ValorAgrupacion", self.dropdown_value_var.get())
-        self.config.set("Informe", "IdFechaDesde", self.fecha_desde_var.get())
-        self.config.set("Informe", "IdFechaHasta", self.fecha_hasta_var.get())
-        self.config.set("Archivos", "CarpetaDescargas", self.downloads_folder_var.get())
-        self.config.set("Archivos", "ArchivoSalida", self.output_file_var.get())
-        
-        # Guardar configuración de columnas merge
-        if not self.config.has_section("ColumnasMerge"):
-            self.config.add_section("ColumnasMerge")
-        self.config.set("ColumnasMerge", "HospitalizacionTotal", self.hosp_total_var.get())
-        self.config.set("ColumnasMerge", "ConsultaExternaTotal", self.cons_total_var.get())
-        self.config.set("ColumnasMerge", "Emergencia", self.emerg_var.get())
+        for _, _, fields in self.CONFIG_TAB_FIELDS:
+            for _, attr, section, key, _ in fields:
+                if not self.config.has_section(section):
+                    self.config.add_section(section)
+                self.config.set(section, key, getattr(self, attr).get())
         
         self.save_config()
         messagebox.showinfo("Guardado", "Configuración guardada correctamente")
     
     def refresh_multipliers_list(self):
         """Actualiza la lista de multiplicadores"""
-        for item in self.mult_tree.get_children():
-            self.mult_tree.delete(item)
-        
-        for exam, mult in self.exam_config.get("multipliers", {}).items():
-            self.mult_tree.insert("", "end", values=(exam, mult))
+        self.populate_tree(self.mult_tree, self.exam_config.get("multipliers", {}).items())
     
     def add_multiplier(self):
         """Agrega un nuevo multiplicador"""
@@ -1220,7 +1717,8 @@ class EstadisticaHospitalApp:
             self.exam_config["exam_categories"] = {}
         
         self.exam_config["exam_categories"][name] = cat
-        self.exam_cat_tree.insert("", "end", values=(name, cat))
+        self.categories_version += 1
+        self.append_tree_row(self.exam_cat_tree, (name, cat))
         self.exam_name_var.set("")
     
     def delete_exam_category(self):
@@ -1232,6 +1730,7 @@ class EstadisticaHospitalApp:
         name = self.exam_cat_tree.item(selected[0])['values'][0]
         if name in self.exam_config.get("exam_categories", {}):
             del self.exam_config["exam_categories"][name]
+            self.categories_version += 1
         
         self.exam_cat_tree.delete(selected[0])
     
@@ -1248,7 +1747,8 @@ class EstadisticaHospitalApp:
             self.exam_config["seccion_categories"] = {}
         
         self.exam_config["seccion_categories"][name] = cat
-        self.section_cat_tree.insert("", "end", values=(name, cat))
+        self.categories_version += 1
+        self.append_tree_row(self.section_cat_tree, (name, cat))
         self.section_name_var.set("")
     
     def delete_section_category(self):
@@ -1260,6 +1760,7 @@ class EstadisticaHospitalApp:
         name = self.section_cat_tree.item(selected[0])['values'][0]
         if name in self.exam_config.get("seccion_categories", {}):
             del self.exam_config["seccion_categories"][name]
+            self.categories_version += 1
         
         self.section_cat_tree.delete(selected[0])
     
@@ -1286,10 +1787,21 @@ class EstadisticaHospitalApp:
             self.exam_config["exam_categories"] = {}
         
         self.exam_config["exam_categories"][exam] = cat
+        self.categories_version += 1
         self.save_exam_config()
         
+        # Mantener al día la caché de "Sin Categorizar" (ordenada por examen):
+        # se quitan las entradas del examen por búsqueda binaria, sin recalcular
+        cache = self.uncategorized_cache
+        if cache and cache[0] is self.exam_catalog and cache[1] == self.categories_version - 1:
+            rows = cache[2]
+            lo = bisect.bisect_left(rows, str(exam), key=operator.itemgetter(0))
+            hi = bisect.bisect_right(rows, str(exam), lo=lo, key=operator.itemgetter(0))
+            del rows[lo:hi]
+            self.uncategorized_cache = (cache[0], self.categories_version, rows)
+        
         # Actualizar listas
-        self.exam_cat_tree.insert("", "end", values=(exam, cat))
+        self.append_tree_row(self.exam_cat_tree, (exam, cat))
         self.uncat_tree.delete(selected[0])
         
         messagebox.showinfo("Agregado", f"'{exam}' agregado a categoría '{cat}'")
@@ -1311,26 +1823,36 @@ class EstadisticaHospitalApp:
         
         for seccion, exams in examenes_dict.items():
             # Check if this section has a category mapping
-            if seccion in seccion_categories:
-                categoria = seccion_categories[seccion]
-                for exam in exams:
-                    # Only add if exam doesn't already have a category
-                    if exam not in exam_categories:
-                        exam_categories[exam] = categoria
-                        nuevas_categorias += 1
-            else:
+            categoria = seccion_categories.get(seccion)
+            if categoria is None:
                 # Section doesn't have a category mapping
                 secciones_sin_categoria.add(seccion)
+                continue
+            
+            # Only add exams that don't already have a category (diferencia de
+            # conjuntos y alta en bloque, en orden alfabético para un JSON estable)
+            nuevos = dict.fromkeys(exams).keys() - exam_categories.keys()
+            exam_categories.update(dict.fromkeys(sorted(nuevos), categoria))
+            nuevas_categorias += len(nuevos)
         
         # Save updates
         self.exam_config["exam_categories"] = exam_categories
+        self.categories_version += 1
         self.save_exam_config()
         
+        # Sin categorizar: solo pueden quedar exámenes de secciones sin categoría;
+        # se deja en la caché para que show_uncategorized no recorra el catálogo otra vez
+        uncategorized = sorted(
+            ((exam, seccion)
+             for seccion, exams in examenes_dict.items()
+             if seccion in secciones_sin_categoria
+             for exam in exams
+             if exam not in exam_categories),
+            key=operator.itemgetter(0))
+        self.uncategorized_cache = (self.exam_catalog, self.categories_version, uncategorized)
+        
         # Refresh the exam categories tree
-        for item in self.exam_cat_tree.get_children():
-            self.exam_cat_tree.delete(item)
-        for name, cat in exam_categories.items():
-            self.exam_cat_tree.insert("", "end", values=(name, cat))
+        self.populate_tree(self.exam_cat_tree, exam_categories.items())
         
         # Show results
         msg = f"Auto-categorización completada:\n\n"
@@ -1353,25 +1875,127 @@ class EstadisticaHospitalApp:
     # FUNCIONES DE CONTROL DE PROCESO
     # ============================================
     
-    def log(self, message: str):
-        """Agrega mensaje al log"""
-        timestamp = datetime.now().strftime("[%H:%M:%S]")
-        self.log_text.insert("end", f"{timestamp} {message}\n")
+    def is_ui_thread(self) -> bool:
+        """Indica si se está ejecutando en el hilo de la interfaz"""
+        return threading.current_thread() is threading.main_thread()
+    
+    def poll_ui_queue(self):
+        """Aplica los eventos pendientes de los hilos de trabajo y se reprograma"""
+        try:
+            self.drain_ui_queue()
+        finally:
+            self.root.after(30, self.poll_ui_queue)
+    
+    def drain_ui_queue(self):
+        """Aplica todos los eventos pendientes en la cola de UI (hilo de la interfaz)"""
+        # Las líneas de log se insertan juntas en una sola llamada y del
+        # progreso solo se aplica el último valor (con el último estado no vacío)
+        pending_lines = []
+        pending_progress = None
+        while True:
+            try:
+                event = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            kind = event[0]
+            if kind == "log":
+                pending_lines.append(event[1])
+            elif kind == "progress":
+                status = event[2] or (pending_progress[1] if pending_progress else "")
+                pending_progress = (event[1], status)
+            else:
+                # "finish" y "call": primero se muestra lo que estaba pendiente
+                if pending_lines:
+                    self.write_log("".join(pending_lines))
+                    pending_lines.clear()
+                if pending_progress:
+                    self.set_progress(*pending_progress)
+                    pending_progress = None
+                if kind == "finish":
+                    self.finish_process(event[1])
+                else:
+                    event[1](*event[2])
+        
+        if pending_lines:
+            self.write_log("".join(pending_lines))
+        if pending_progress:
+            self.set_progress(*pending_progress)
+    
+    def refresh_ui(self):
+        """Procesa las tareas pendientes de Tk, como máximo una vez cada UI_REFRESH_INTERVAL s"""
+        now = time.monotonic()
+        if now - self.last_ui_refresh >= UI_REFRESH_INTERVAL:
+            self.last_ui_refresh = now
+            self.root.update_idletasks()
+    
+    def call_in_ui(self, func, *args):
+        """Ejecuta func(*args) en el hilo de la interfaz (directamente o vía la cola de UI)"""
+        if self.is_ui_thread():
+            func(*args)
+        else:
+            self.ui_queue.put(("call", func, args))
+    
+    def write_log(self, text: str):
+        """Escribe texto en el widget de log conservando solo las últimas MAX_LOG_LINES líneas"""
+        self.log_text.insert("end", text)
+        line_count = int(self.log_text.index("end-1c").split(".")[0])
+        if line_count > MAX_LOG_LINES:
+            self.log_text.delete("1.0", f"{line_count - MAX_LOG_LINES}.0")
         self.log_text.see("end")
-        self.root.update_idletasks()
     
-    def update_progress(self, current: int, total: int, status: str = ""):
-        """Actualiza la barra de progreso"""
-        percentage = (current / total * 100) if total > 0 else 0
+    def set_progress(self, percentage: float, status: str):
+        """Actualiza la barra de progreso y el estado"""
         self.progress_var.set(percentage)
         if status:
             self.status_var.set(status)
-        self.root.update_idletasks()
+    
+    def log(self, message: str):
+        """Agrega mensaje al log (seguro desde cualquier hilo)"""
+        timestamp = time.strftime("[%H:%M:%S]")
+        line = f"{timestamp} {message}\n"
+        
+        if not self.is_ui_thread():
+            self.ui_queue.put(("log", line))
+            return
+        
+        # Mantener el orden respecto a mensajes encolados por otros hilos
+        self.drain_ui_queue()
+        self.write_log(line)
+        self.refresh_ui()
+    
+    def update_progress(self, current: int, total: int, status: str = ""):
+        """Actualiza la barra de progreso (seguro desde cualquier hilo)"""
+        percentage = (current / total * 100) if total > 0 else 0
+        
+        if not self.is_ui_thread():
+            self.ui_queue.put(("progress", percentage, status))
+            return
+        
+        self.drain_ui_queue()
+        self.set_progress(percentage, status)
+        self.refresh_ui()
     
     def start_process(self):
         """Inicia el proceso de descarga"""
         if self.is_running:
             return
+        if self.catalog_running:
+            messagebox.showwarning("Aviso", "Espere a que termine la actualización del catálogo.")
+            return
+        
+        # Leer los parámetros en el hilo de la interfaz
+        try:
+            start_date = self.get_start_date()
+            end_date = self.get_end_date()
+        except ValueError as e:
+            messagebox.showerror("Error", f"Fecha inválida: {e}")
+            return
+        headless = self.headless_var.get()
+        force_refresh = self.force_refresh_var.get()
+        
+        # El perfil de Chrome no puede estar abierto por el navegador del catálogo
+        self.release_catalog_browser()
         
         self.is_running = True
         self.should_stop = False
@@ -1382,7 +2006,7 @@ class EstadisticaHospitalApp:
         self.log_text.delete(1.0, "end")
         
         # Ejecutar en hilo separado
-        thread = threading.Thread(target=self.run_automation)
+        thread = threading.Thread(target=self.run_automation, args=(start_date, end_date, headless, force_refresh))
         thread.daemon = True
         thread.start()
     
@@ -1393,44 +2017,64 @@ class EstadisticaHospitalApp:
     
     def finish_process(self, success: bool = True):
         """Finaliza el proceso y restaura la GUI"""
+        if not self.is_ui_thread():
+            self.ui_queue.put(("finish", success))
+            return
+        
         self.is_running = False
         self.start_button.config(state="normal")
         self.stop_button.config(state="disabled")
         
-        if success and self.output_file_path and self.output_file_path.exists():
-            self.open_excel_button.config(state="normal")
+        if success and self.refresh_excel_button_state(force=True):
             self.status_var.set("Completado - Haga clic en 'Abrir Excel' para ver resultados")
         else:
             self.status_var.set("Proceso finalizado")
     
+    def refresh_excel_button_state(self, force: bool = False) -> bool:
+        """Habilita 'Abrir Excel' si el archivo de salida existe (stat cacheado EXCEL_STAT_TTL s)"""
+        now = time.monotonic()
+        if force or self.excel_stat_time is None or now - self.excel_stat_time > EXCEL_STAT_TTL:
+            self.excel_exists = self.output_file_path.is_file()
+            self.excel_stat_time = now
+        
+        self.open_excel_button.config(state="normal" if self.excel_exists else "disabled")
+        return self.excel_exists
+    
+    def open_path(self, path: Path):
+        """Abre un archivo o carpeta con la aplicación predeterminada del sistema"""
+        if hasattr(os, "startfile"):
+            os.startfile(path)  # ShellExecute directo, sin consola intermedia
+        else:
+            opener = "open" if sys.platform == "darwin" else "xdg-open"
+            subprocess.Popen([opener, str(path)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    
     def open_excel(self):
         """Abre el archivo Excel generado"""
-        if self.output_file_path and self.output_file_path.exists():
+        if self.refresh_excel_button_state():
             try:
-                os.startfile(self.output_file_path)
+                self.open_path(self.output_file_path)
             except Exception as e:
                 messagebox.showerror("Error", f"No se pudo abrir el archivo: {e}")
     
     def open_folder(self):
         """Abre la carpeta de descargas"""
-        downloads_folder = self.base_dir / self.config.get("Archivos", "CarpetaDescargas")
+        downloads_folder = self.base_dir / self.get_setting("Archivos", "CarpetaDescargas")
         downloads_folder.mkdir(exist_ok=True)
         try:
-            os.startfile(downloads_folder)
+            self.open_path(downloads_folder)
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo abrir la carpeta: {e}")
     
     def recalculate_excel(self):
         """Recalcula el Excel con los archivos descargados existentes"""
-        downloads_folder = self.base_dir / self.config.get("Archivos", "CarpetaDescargas")
+        downloads_folder = self.base_dir / self.get_setting("Archivos", "CarpetaDescargas")
         
         if not downloads_folder.exists():
             messagebox.showwarning("Aviso", "No existe la carpeta de descargas.\nPrimero descargue los datos.")
             return
         
         # Verificar si hay archivos Excel
-        pattern = re.compile(r'^\d.*\.xlsx$')
-        xlsx_files = [f for f in downloads_folder.glob('*.xlsx') if pattern.match(f.name)]
+        xlsx_files = list_downloaded_files(downloads_folder)
         
         if not xlsx_files:
             messagebox.showwarning("Aviso", "No hay archivos Excel en la carpeta de descargas.\nPrimero descargue los datos.")
@@ -1445,16 +2089,16 @@ class EstadisticaHospitalApp:
             return
         
         # Recalcular
-        self.output_file_path = self.base_dir / self.config.get("Archivos", "ArchivoSalida")
+        self.output_file_path = self.base_dir / self.get_setting("Archivos", "ArchivoSalida")
         
         self.log("=" * 50)
         self.log("🔄 Recalculando Excel...")
         self.log(f"   Archivos encontrados: {len(xlsx_files)}")
         
         try:
-            self.process_excel_files(downloads_folder)
+            self.process_excel_files(downloads_folder, xlsx_files)
             self.log("✅ Excel regenerado correctamente")
-            self.open_excel_button.config(state="normal")
+            self.refresh_excel_button_state(force=True)
             messagebox.showinfo("Completado", "Excel regenerado correctamente")
         except Exception as e:
             self.log(f"❌ Error: {str(e)}")
@@ -1462,39 +2106,35 @@ class EstadisticaHospitalApp:
     
     def check_file_locked(self, filepath: Path) -> bool:
         """Verifica si un archivo está bloqueado (abierto en otra aplicación)"""
-        if not filepath.exists():
-            return False
-        
+        # Abrirlo en lectura/escritura (sin crearlo ni modificarlo) falla en
+        # Windows si otra aplicación (Excel) lo tiene abierto
         try:
-            with open(filepath, 'a'):
-                pass
+            fd = os.open(filepath, os.O_RDWR)
+        except FileNotFoundError:
             return False
-        except (IOError, PermissionError):
+        except OSError:
             return True
+        os.close(fd)
+        return False
     
     # ============================================
     # AUTOMATIZACIÓN PRINCIPAL
     # ============================================
     
-    def run_automation(self):
-        """Ejecuta el proceso de automatización"""
+    def run_automation(self, start_date: date, end_date: date, headless: bool, force_refresh: bool = False):
+        """Ejecuta el proceso de automatización (en hilo de trabajo)"""
         try:
-            # Obtener parámetros de fechas
-            start_date = self.get_start_date()
-            end_date = self.get_end_date()
-            headless = self.headless_var.get()
-            
-            url = self.config.get("General", "URL")
+            url = self.get_setting("General", "URL")
             
-            dropdown_id = self.config.get("Informe", "IdDropdownAgrupar", fallback="agrupar-por")
-            dropdown_value = self.config.get("Informe", "ValorAgrupacion", fallback="SECCION_TIPO_ATENCION")
-            id_fecha_desde = self.config.get("Informe", "IdFechaDesde")
-            id_fecha_hasta = self.config.get("Informe", "IdFechaHasta")
+            dropdown_id = self.get_setting("Informe", "IdDropdownAgrupar")
+            dropdown_value = self.get_setting("Informe", "ValorAgrupacion")
+            id_fecha_desde = self.get_setting("Informe", "IdFechaDesde")
+            id_fecha_hasta = self.get_setting("Informe", "IdFechaHasta")
             
-            downloads_folder = self.base_dir / self.config.get("Archivos", "CarpetaDescargas")
+            downloads_folder = self.base_dir / self.get_setting("Archivos", "CarpetaDescargas")
             downloads_folder.mkdir(exist_ok=True)
             
-            self.output_file_path = self.base_dir / self.config.get("Archivos", "ArchivoSalida")
+            self.output_file_path = self.base_dir / self.get_setting("Archivos", "ArchivoSalida")
             
             # Verificar si el archivo de salida está bloqueado
             if self.check_file_locked(self.output_file_path):
@@ -1502,189 +2142,234 @@ class EstadisticaHospitalApp:
                 self.log("   Por favor, cierre Excel antes de continuar")
                 
                 # Mostrar diálogo
-                self.root.after(0, lambda: messagebox.showwarning(
+                self.call_in_ui(
+                    messagebox.showwarning,
                     "Archivo Bloqueado",
                     f"El archivo '{self.output_file_path.name}' está abierto en otra aplicación.\n\n"
                     "Por favor, cierre Excel y haga clic en 'Iniciar Descarga' nuevamente."
-                ))
+                )
                 self.finish_process(success=False)
                 return
             
             browser_data_folder = self.base_dir / "browser_data"
             browser_data_folder.mkdir(exist_ok=True)
             
-            # Calcular total de días
-            total_days = (end_date - start_date).days + 1
-            
             self.log("=" * 50)
             self.log("🚀 Iniciando automatización...")
-            self.log(f"📅 Rango: {start_date.strftime('%Y-%m-%d')} al {end_date.strftime('%Y-%m-%d')}")
+            self.log(f"📅 Rango: {start_date.isoformat()} al {end_date.isoformat()}")
             self.log(f"📁 Carpeta de descargas: {downloads_folder}")
             self.log("=" * 50)
             
-            with sync_playwright() as p:
-                self.log("🌐 Iniciando navegador Chrome...")
-                self.log("   💾 Los datos de sesión se guardarán para futuros usos")
-                
-                context = p.chromium.launch_persistent_context(
-                    user_data_dir=str(browser_data_folder),
-                    headless=headless,
-                    channel="chrome",
-                    accept_downloads=True
-                )
-                
-                page = context.pages[0] if context.pages else context.new_page()
-                
-                self.log(f"📄 Navegando a {url}")
-                page.goto(url, timeout=60000)
-                page.wait_for_load_state("networkidle", timeout=30000)
-                
-                # Verificar login
-                max_login_wait = 300
-                login_check_interval = 2
-                waited_time = 0
-                logged_in = False
-                first_message = True
-                
-                while not logged_in:
-                    if self.should_stop:
-                        context.close()
-                        self.finish_process(success=False)
-                        return
-                    
-                    try:
-                        page.wait_for_load_state("domcontentloaded", timeout=2000)
-                    except:
-                        pass
+            # Días del rango; los que ya tienen archivo (no vacío) no se vuelven a descargar
+            downloaded_files = []
+            days = []
+            for i in range((end_date - start_date).days + 1):
+                current = start_date + timedelta(days=i)
+                download_path = downloads_folder / f"{current.isoformat()}.xlsx"
+                if not force_refresh and download_path.is_file() and download_path.stat().st_size > 0:
+                    downloaded_files.append(download_path)
+                else:
+                    days.append(current)
+            total_days = len(days)
+            
+            if downloaded_files:
+                self.log(f"⏭️ {len(downloaded_files)} días ya descargados se reutilizan")
+            
+            if days:
+                with sync_playwright() as p:
+                    self.log("🌐 Iniciando navegador Chrome...")
+                    self.log("   💾 Los datos de sesión se guardarán para futuros usos")
                     
-                    try:
-                        generar_btn = page.query_selector("button:has-text('Generar informe')")
-                        if generar_btn:
-                            logged_in = True
-                            self.log("✅ Sesión detectada correctamente!")
-                            break
-                    except:
-                        pass
+                    context = p.chromium.launch_persistent_context(
+                        user_data_dir=str(browser_data_folder),
+                        headless=headless,
+                        channel="chrome",
+                        accept_downloads=True
+                    )
                     
-                    if first_message:
-                        self.log("🔐 No se detectó sesión activa.")
-                        self.log("   👉 Por favor, inicie sesión en la ventana del navegador...")
-                        self.log(f"   ⏳ Esperando inicio de sesión (máximo {max_login_wait // 60} minutos)...")
-                        first_message = False
+                    page = context.pages[0] if context.pages else context.new_page()
                     
-                    time.sleep(login_check_interval)
-                    waited_time += login_check_interval
+                    self.log(f"📄 Navegando a {url}")
+                    page.goto(url, timeout=60000, wait_until="domcontentloaded")
                     
-                    if waited_time % 10 == 0:
-                        self.log(f"   ⏳ Esperando... ({waited_time}s)")
+                    # Localizadores de una pestaña, reutilizados en todos sus días
+                    def report_slot(pg):
+                        return {
+                            "page": pg,
+                            "generar": pg.locator("button:has-text('Generar informe')").first,
+                            "excel": pg.locator("a:has-text('Excel')").first,
+                            "dropdown": pg.locator(f"#{dropdown_id}"),
+                            "configured": False,
+                        }
                     
-                    if waited_time >= max_login_wait:
-                        self.log("❌ Tiempo de espera agotado. No se detectó inicio de sesión.")
-                        context.close()
-                        self.finish_process(success=False)
-                        return
-                
-                # Estabilizar página
-                try:
-                    page.wait_for_load_state("networkidle", timeout=5000)
-                except:
-                    pass
-                time.sleep(1)
-                
-                self.log("🚀 Comenzando descargas...")
-                
-                downloaded_files = []
-                
-                # Iterar por cada día en el rango
-                current = start_date
-                day_index = 0
-                while current <= end_date:
-                    if self.should_stop:
-                        self.log("⏹ Proceso detenido por el usuario")
-                        break
+                    slots = [report_slot(page)]
+                    generar_locator = slots[0]["generar"]
                     
-                    current_date_str = current.strftime('%Y-%m-%d')
-                    self.update_progress(day_index, total_days, f"Descargando {current_date_str}...")
-                    self.log(f"📥 Procesando día {day_index + 1}/{total_days}: {current_date_str}")
+                    # Verificar login: el botón "Generar informe" solo aparece con sesión
+                    # activa. Se espera por él en tramos cortos para poder detener el proceso.
+                    max_login_wait = 300
+                    login_check_interval = 2
+                    login_start = time.monotonic()
+                    next_notice = 10
+                    first_message = True
                     
-                    try:
-                        # Establecer fechas - Ctrl+A para seleccionar todo, luego escribir
-                        fecha_desde = page.locator(f"#{id_fecha_desde}")
-                        fecha_hasta = page.locator(f"#{id_fecha_hasta}")
+                    while True:
+                        if self.should_stop:
+                            context.close()
+                            self.finish_process(success=False)
+                            return
                         
-                        # Fecha desde: click, Ctrl+A, escribir, Tab
-                        fecha_desde.click()
-                        page.keyboard.press("Control+a")
-                        page.keyboard.type(current_date_str, delay=20)
-                        page.keyboard.press("Tab")
+                        try:
+                            generar_locator.wait_for(state="attached", timeout=login_check_interval * 1000)
+                            self.log("✅ Sesión detectada correctamente!")
+                            break
+                        except PlaywrightTimeout:
+                            pass
+                        except Exception:
+                            # Navegación en curso (p. ej. tras el login): reintentar
+                            time.sleep(login_check_interval)
                         
-                        # Fecha hasta: click, Ctrl+A, escribir, Tab
-                        fecha_hasta.click()
-                        page.keyboard.press("Control+a")
-                        page.keyboard.type(current_date_str, delay=20)
-                        page.keyboard.press("Tab")
+                        if first_message:
+                            self.log("🔐 No se detectó sesión activa.")
+                            self.log("   👉 Por favor, inicie sesión en la ventana del navegador...")
+                            self.log(f"   ⏳ Esperando inicio de sesión (máximo {max_login_wait // 60} minutos)...")
+                            first_message = False
                         
-                        # Espera para que Vue procese
-                        time.sleep(0.3)
+                        waited_time = int(time.monotonic() - login_start)
+                        if waited_time >= next_notice:
+                            self.log(f"   ⏳ Esperando... ({waited_time}s)")
+                            next_notice += 10
                         
-                        # Verificar que las fechas se establecieron correctamente
-                        actual_desde = fecha_desde.input_value()
-                        actual_hasta = fecha_hasta.input_value()
+                        if waited_time >= max_login_wait:
+                            self.log("❌ Tiempo de espera agotado. No se detectó inicio de sesión.")
+                            context.close()
+                            self.finish_process(success=False)
+                            return
+                    
+                    # Abrir pestañas adicionales (comparten la sesión del contexto). La API
+                    # sync de Playwright no admite varios hilos, así que los informes se
+                    # generan a la vez en todas las pestañas y se descargan desde este hilo.
+                    extra_pages = min(REPORT_PAGES, total_days) - 1
+                    if extra_pages > 0:
+                        self.log(f"🗂️ Abriendo {extra_pages} pestañas adicionales...")
+                    for _ in range(extra_pages):
+                        try:
+                            extra = context.new_page()
+                            extra.goto(url, timeout=60000, wait_until="domcontentloaded")
+                            slot = report_slot(extra)
+                            slot["generar"].wait_for(state="attached", timeout=30000)
+                            slots.append(slot)
+                        except Exception as e:
+                            self.log(f"   ⚠️ No se pudo preparar otra pestaña: {e}")
+                            break
+                    
+                    self.log("🚀 Comenzando descargas...")
+                    
+                    # Script para establecer ambas fechas en una sola llamada y notificar a Vue
+                    set_dates_js = (
+                        "([desdeId, hastaId, v]) => {"
+                        " for (const id of [desdeId, hastaId]) {"
+                        "  const el = document.getElementById(id);"
+                        "  if (!el) continue;"
+                        "  el.value = v;"
+                        "  el.dispatchEvent(new Event('input', {bubbles: true}));"
+                        "  el.dispatchEvent(new Event('change', {bubbles: true}));"
+                        " }"
+                        " }"
+                    )
+                    dates_match_js = (
+                        "([desdeId, hastaId, v]) =>"
+                        " [desdeId, hastaId].every(id => document.getElementById(id)?.value === v)"
+                    )
+                    read_dates_js = (
+                        "([desdeId, hastaId]) =>"
+                        " [desdeId, hastaId].map(id => document.getElementById(id)?.value ?? null)"
+                    )
+                    
+                    # Iterar por los días pendientes en tandas de un día por pestaña
+                    day_index = 0
+                    for batch_start in range(0, total_days, len(slots)):
+                        if self.should_stop:
+                            self.log("⏹ Proceso detenido por el usuario")
+                            break
                         
-                        if actual_desde != current_date_str or actual_hasta != current_date_str:
-                            self.log(f"   ⚠️ Fechas no coinciden: desde={actual_desde}, hasta={actual_hasta}")
+                        batch = list(zip(slots, days[batch_start:batch_start + len(slots)]))
                         
-                        # Configurar dropdown (solo primer día)
-                        if day_index == 0:
-                            self.log("   🔧 Configurando dropdown de agrupación...")
+                        # Fase 1: fechas + "Generar informe" en cada pestaña, sin esperar resultados
+                        generated = []
+                        for slot, current in batch:
+                            current_date_str = current.isoformat()
                             try:
-                                dropdown = page.query_selector(f"#{dropdown_id}")
-                                if dropdown:
-                                    dropdown.select_option(value=dropdown_value)
-                                    self.log(f"   ✅ Dropdown seleccionado: {dropdown_value}")
-                                else:
-                                    self.log(f"   ⚠️ No se encontró el dropdown #{dropdown_id}")
+                                # Establecer ambas fechas con una sola evaluación JS
+                                date_args = [id_fecha_desde, id_fecha_hasta, current_date_str]
+                                slot["page"].evaluate(set_dates_js, date_args)
+                                
+                                # Esperar a que ambos campos conserven la fecha (en lugar de una
+                                # pausa fija); solo si no ocurre se leen los valores para el aviso
+                                try:
+                                    slot["page"].wait_for_function(dates_match_js, arg=date_args, timeout=5000)
+                                except PlaywrightTimeout:
+                                    actual_desde, actual_hasta = slot["page"].evaluate(read_dates_js, date_args)
+                                    self.log(f"   ⚠️ Fechas no coinciden ({current_date_str}): desde={actual_desde}, hasta={actual_hasta}")
+                                
+                                # Configurar dropdown (solo el primer día de cada pestaña)
+                                if not slot["configured"]:
+                                    slot["configured"] = True
+                                    if slot is slots[0]:
+                                        self.log("   🔧 Configurando dropdown de agrupación...")
+                                    try:
+                                        if slot["dropdown"].count():
+                                            slot["dropdown"].select_option(value=dropdown_value)
+                                            if slot is slots[0]:
+                                                self.log(f"   ✅ Dropdown seleccionado: {dropdown_value}")
+                                        else:
+                                            self.log(f"   ⚠️ No se encontró el dropdown #{dropdown_id}")
+                                    except Exception as e:
+                                        self.log(f"   ⚠️ Error seleccionando dropdown: {e}")
+                                
+                                # Hacer clic en "Generar informe" para refrescar datos
+                                slot["generar"].click()
+                                generated.append((slot, current_date_str))
+                            except PlaywrightTimeout:
+                                self.log(f"   ⚠️ Timeout en {current_date_str}, continuando...")
                             except Exception as e:
-                                self.log(f"   ⚠️ Error seleccionando dropdown: {e}")
-                        
-                        # Hacer clic en "Generar informe" para refrescar datos
-                        generar_btn = page.locator("button:has-text('Generar informe')").first
-                        generar_btn.click()
+                                self.log(f"   ❌ Error en {current_date_str}: {str(e)}")
                         
-                        # Esperar a que aparezca el menú dropdown con Excel
-                        try:
-                            page.wait_for_selector("a:has-text('Excel')", timeout=15000)
-                        except:
-                            self.log(f"   ⚠️ No apareció el enlace Excel")
-                        
-                        time.sleep(0.2)
-                        
-                        # Buscar y hacer clic en Excel
-                        excel_link = page.locator("a:has-text('Excel')").first
-                        
-                        if excel_link.count() > 0:
-                            with page.expect_download(timeout=30000) as download_info:
-                                excel_link.click()
-                            
-                            download = download_info.value
-                            download_path = downloads_folder / f"{current_date_str}.xlsx"
-                            download.save_as(download_path)
-                            downloaded_files.append(download_path)
+                        # Fase 2: descargar el Excel de cada pestaña en orden de fecha
+                        for slot, current_date_str in generated:
+                            self.update_progress(day_index, total_days, f"Descargando {current_date_str}...")
+                            self.log(f"📥 Procesando día {day_index + 1}/{total_days}: {current_date_str}")
+                            day_index += 1
                             
-                            self.log(f"   ✅ Guardado: {current_date_str}.xlsx")
-                        else:
-                            self.log(f"   ⚠️ No se encontró el enlace Excel para {current_date_str}")
+                            try:
+                                excel_locator = slot["excel"]
+                                
+                                # Hacer clic en Excel: click() ya espera a que el enlace del
+                                # menú sea visible y estable, sin espera ni pausa previas
+                                try:
+                                    with slot["page"].expect_download(timeout=30000) as download_info:
+                                        excel_locator.click(timeout=15000)
+                                except PlaywrightTimeout:
+                                    if excel_locator.is_visible():
+                                        raise
+                                    self.log(f"   ⚠️ No se encontró el enlace Excel para {current_date_str}")
+                                    continue
+                                
+                                download = download_info.value
+                                download_path = downloads_folder / f"{current_date_str}.xlsx"
+                                download.save_as(download_path)
+                                downloaded_files.append(download_path)
+                                
+                                self.log(f"   ✅ Guardado: {current_date_str}.xlsx")
+                                
+                            except PlaywrightTimeout:
+                                self.log(f"   ⚠️ Timeout en {current_date_str}, continuando...")
+                            except Exception as e:
+                                self.log(f"   ❌ Error en {current_date_str}: {str(e)}")
                         
-                    except PlaywrightTimeout:
-                        self.log(f"   ⚠️ Timeout en {current_date_str}, continuando...")
-                    except Exception as e:
-                        self.log(f"   ❌ Error en {current_date_str}: {str(e)}")
+                        day_index = batch_start + len(batch)
                     
-                    # Avanzar al siguiente día
-                    current += timedelta(days=1)
-                    day_index += 1
-                
-                context.close()
+                    context.close()
             
             if self.should_stop:
                 self.finish_process(success=False)
@@ -1697,7 +2382,8 @@ class EstadisticaHospitalApp:
             self.log("📊 Procesando archivos descargados...")
             
             if downloaded_files:
-                self.process_excel_files(downloads_folder)
+                # Solo los días del rango (descargados o reutilizados), sin volver a listar la carpeta
+                self.process_excel_files(downloads_folder, sorted(downloaded_files))
                 self.update_progress(100, 100, "¡Completado!")
                 self.log("=" * 50)
                 self.log(f"✅ ¡Proceso completado! Se procesaron {len(downloaded_files)} archivos.")
@@ -1712,8 +2398,15 @@ class EstadisticaHospitalApp:
             self.log(traceback.format_exc())
             self.finish_process(success=False)
     
-    def process_excel_files(self, downloads_folder: Path):
-        """Procesa los archivos Excel descargados"""
+    def get_merge_columns(self, key: str) -> tuple:
+        """Obtiene las columnas a combinar para una clave de [ColumnasMerge]"""
+        value = self.get_setting("ColumnasMerge", key)
+        if value is None or value == DEFAULT_CONFIG["ColumnasMerge"][key]:
+            return DEFAULT_MERGE_COLUMNS[key]
+        return tuple(c.strip() for c in value.split(","))
+    
+    def process_excel_files(self, downloads_folder: Path, file_list: Optional[list] = None):
+        """Procesa los archivos Excel descargados (file_list o, si no se indica, todos los de la carpeta)"""
         output_file = self.output_file_path
         
         # Verificar si el archivo está bloqueado
@@ -1722,15 +2415,15 @@ class EstadisticaHospitalApp:
             self.log("   Por favor, cierre Excel antes de continuar")
             
             # Preguntar al usuario
-            self.root.after(0, lambda: messagebox.showwarning(
+            self.call_in_ui(
+                messagebox.showwarning,
                 "Archivo Bloqueado",
                 f"El archivo '{output_file.name}' está abierto en otra aplicación.\n\n"
                 "Por favor, cierre Excel e intente procesar nuevamente."
-            ))
+            )
             return
         
-        pattern = re.compile(r'^\d.*\.xlsx$')
-        xlsx_files = sorted([f for f in downloads_folder.glob('*.xlsx') if pattern.match(f.name)])
+        xlsx_files = file_list if file_list is not None else list_downloaded_files(downloads_folder)
         
         if not xlsx_files:
             self.log("❌ No se encontraron archivos Excel para procesar")
@@ -1738,9 +2431,20 @@ class EstadisticaHospitalApp:
         
         self.log(f"   Encontrados {len(xlsx_files)} archivos")
         
+        # Leer todos los archivos en paralelo (cada lectura es independiente)
+        def read_report(filepath):
+            try:
+                return pd.read_excel(filepath, skiprows=4, engine=EXCEL_READ_ENGINE), None
+            except Exception as e:
+                return None, e
+        
+        with ThreadPoolExecutor(max_workers=min(8, len(xlsx_files))) as executor:
+            raw_dataframes = list(executor.map(read_report, xlsx_files))
+        
         # Detectar estructura
-        first_file = xlsx_files[0]
-        sample_df = pd.read_excel(first_file, skiprows=4)
+        sample_df, sample_error = raw_dataframes[0]
+        if sample_error is not None:
+            raise sample_error
         self.log(f"   📋 Columnas detectadas: {list(sample_df.columns)}")
         
         has_patient_type_columns = any(col in sample_df.columns for col in ['Hospitalización', 'Emergencia', 'Consulta Externa'])
@@ -1752,33 +2456,31 @@ class EstadisticaHospitalApp:
             self.log("   ⚠️ Informe simple detectado (sin desglose por tipo de atención)")
             self.log("   ℹ️  El dropdown 'Agrupar por' no se seleccionó correctamente")
         
-        # Leer y combinar
+        # Normalizar y combinar
         all_dataframes = []
-        for filepath in xlsx_files:
+        file_stems = []
+        for filepath, (df, read_error) in zip(xlsx_files, raw_dataframes):
+            if read_error is not None:
+                self.log(f"   ⚠️ Error leyendo {filepath.name}: {read_error}")
+                continue
             try:
-                df = pd.read_excel(filepath, skiprows=4)
-                
                 if 'Sección' in df.columns:
                     df = df.rename(columns={'Sección': 'Seccion'})
                 
-                date_str = filepath.stem
-                try:
-                    df['date'] = pd.to_datetime(date_str, format='%Y-%m-%d')
-                except:
-                    df['date'] = date_str
+                # Índice del archivo como marcador; la fecha se resuelve tras combinar
+                df['date'] = len(file_stems)
                 
                 if has_simple_columns and not has_patient_type_columns:
                     if 'Cant. Exámenes' in df.columns:
                         df['Total'] = df['Cant. Exámenes']
-                    for col in NUMERIC_COLUMNS:
-                        if col not in df.columns:
-                            df[col] = 0
-                else:
-                    for col in NUMERIC_COLUMNS:
-                        if col not in df.columns:
-                            df[col] = 0
+                
+                # Columnas numéricas ausentes a 0, añadidas en una sola operación
+                missing_cols = [col for col in NUMERIC_COLUMNS if col not in df.columns]
+                if missing_cols:
+                    df = df.reindex(columns=[*df.columns, *missing_cols], fill_value=0)
                 
                 all_dataframes.append(df)
+                file_stems.append(filepath.stem)
             except Exception as e:
                 self.log(f"   ⚠️ Error leyendo {filepath.name}: {e}")
         
@@ -1786,8 +2488,14 @@ class EstadisticaHospitalApp:
             self.log("❌ No se pudieron leer los archivos")
             return
         
+        # pd.concat copia cada columna una sola vez; las fechas se convierten por
+        # archivo (no por fila) y se expanden con el índice guardado en 'date'
         combined_df = pd.concat(all_dataframes, ignore_index=True)
-        datos_descargados = combined_df.copy()
+        file_dates = pd.to_datetime(pd.Series(file_stems), format='%Y-%m-%d', errors='coerce')
+        combined_df['date'] = file_dates.to_numpy()[combined_df['date'].to_numpy()]
+        # Copia superficial: las columnas se reemplazan (no se modifican in situ)
+        # al aplicar multiplicadores, así que los datos crudos se conservan sin duplicarlos
+        datos_descargados = combined_df.copy(deep=False)
         
         self.log(f"   📊 Total de registros combinados: {len(combined_df)}")
         
@@ -1795,24 +2503,28 @@ class EstadisticaHospitalApp:
         multipliers = self.exam_config.get("multipliers", {})
         cultivo_mult = self.exam_config.get("cultivo_multiplier", 10)
         
-        def get_multiplier(exam_name):
-            if pd.isna(exam_name):
-                return 1
-            if "CULTIVO" in str(exam_name).upper():
-                return cultivo_mult
-            return multipliers.get(exam_name, 1)
-        
-        combined_df['multiplier'] = combined_df['Examen'].apply(get_multiplier)
+        # Multiplicador por examen distinto (1 si no está configurado; los cultivos
+        # usan cultivo_mult), expandido después a todas las filas por código
+        exam_codes, exam_uniques = pd.factorize(combined_df['Examen'], use_na_sentinel=False)
+        exam_uniques = pd.Series(exam_uniques)
+        es_cultivo = exam_uniques.astype(str).str.contains("CULTIVO", case=False, regex=False)
+        unique_multipliers = exam_uniques.map(multipliers).fillna(1).where(~es_cultivo, cultivo_mult)
+        combined_df['multiplier'] = unique_multipliers.to_numpy()[exam_codes]
         
         cols_to_multiply = ['Total'] + [col for col in NUMERIC_COLUMNS if col in combined_df.columns and col != 'Total']
         for col in cols_to_multiply:
             if col in combined_df.columns:
-                combined_df[col] = pd.to_numeric(combined_df[col], errors='coerce').fillna(0) * combined_df['multiplier']
-        
-        # Filtrar
-        combined_df = combined_df[combined_df['Examen'].notna()]
-        combined_df = combined_df[~combined_df['Examen'].astype(str).str.contains('^Total órdenes|^Generado el|^$', na=False, regex=True)]
-        combined_df = combined_df[combined_df['Seccion'].notna() & (combined_df['Seccion'] != '')]
+                product = pd.to_numeric(combined_df[col], errors='coerce').fillna(0) * combined_df['multiplier']
+                # Conteos enteros como int32: la mitad de memoria para el groupby (que suma
+                # en int64); con multiplicadores fraccionarios la columna se mantiene float
+                if product.mod(1).eq(0).all() and product.abs().max() < 2**31:
+                    product = product.astype('int32')
+                combined_df[col] = product
+        
+        # Filtrar con una sola máscara; el patrón se evalúa sobre los exámenes distintos
+        skip_exam = exam_uniques.isna() | exam_uniques.astype(str).str.match(SKIP_EXAM_PATTERN)
+        keep = ~skip_exam.to_numpy()[exam_codes] & combined_df['Seccion'].notna() & (combined_df['Seccion'] != '')
+        combined_df = combined_df[keep]
         
         self.log(f"   📊 Registros después de filtrar: {len(combined_df)}")
         
@@ -1820,24 +2532,34 @@ class EstadisticaHospitalApp:
         exam_categories = self.exam_config.get("exam_categories", {})
         seccion_categories = self.exam_config.get("seccion_categories", {})
         
-        def get_category(row):
-            examen = row.get('Examen', '')
-            seccion = row.get('Seccion', '')
-            if pd.isna(examen):
-                return "Other"
-            if examen in exam_categories:
-                return exam_categories[examen]
-            if seccion in seccion_categories:
-                return seccion_categories[seccion]
-            return "Other"
-        
-        combined_df['Category'] = combined_df.apply(get_category, axis=1)
+        # Categoría como Categorical ordenado: agrupa por códigos enteros y
+        # ordena según CATEGORY_ORDER (categorías desconocidas al final)
+        extra_categories = sorted(
+            (set(exam_categories.values()) | set(seccion_categories.values())) - CATEGORY_INDEX.keys()
+        )
+        if extra_categories:
+            category_dtype = pd.CategoricalDtype(list(CATEGORY_ORDER) + extra_categories, ordered=True)
+            category_index = {cat: code for code, cat in enumerate(category_dtype.categories)}
+        else:
+            category_dtype = CATEGORY_DTYPE
+            category_index = CATEGORY_INDEX
+        
+        # Códigos de categoría con dos map() vectorizados: primero por examen,
+        # luego por sección, si no "Other"
+        exam_category_codes = combined_df['Examen'].map(
+            {examen: category_index[cat] for examen, cat in exam_categories.items()})
+        seccion_category_codes = combined_df['Seccion'].map(
+            {seccion: category_index[cat] for seccion, cat in seccion_categories.items()})
+        category_codes = (
+            exam_category_codes.fillna(seccion_category_codes)
+            .fillna(category_index["Other"]).to_numpy(dtype="int64")
+        )
+        combined_df['Category'] = pd.Categorical.from_codes(category_codes, dtype=category_dtype)
         
         # Datos categorizados
-        examenes_categorizados = combined_df.copy()
         cols = ['Seccion', 'Examen', 'multiplier', 'Category'] + \
                [c for c in combined_df.columns if c not in ['Seccion', 'Examen', 'multiplier', 'Category']]
-        examenes_categorizados = examenes_categorizados[cols]
+        examenes_categorizados = combined_df.reindex(columns=cols)
         
         # Determinar columnas para resumen
         if has_patient_type_columns:
@@ -1855,28 +2577,31 @@ class EstadisticaHospitalApp:
             combined_df['Total'] = 0
         
         # Tabla resumen
-        summary_table = combined_df.groupby(['Category', 'date'])[summary_cols].sum().reset_index()
-        
-        def safe_get_col(df, col):
-            return df[col] if col in df.columns else 0
+        summary_table = combined_df.groupby(['Category', 'date'], observed=True, sort=False,
+                                            as_index=False)[summary_cols].sum()
         
         # Obtener configuración de columnas a combinar
-        hosp_cols = [c.strip() for c in self.config.get("ColumnasMerge", "HospitalizacionTotal", 
-                    fallback="Hospitalización,URGENTE HOSPITALIZACION").split(",")]
-        cons_cols = [c.strip() for c in self.config.get("ColumnasMerge", "ConsultaExternaTotal",
-                    fallback="Consulta Externa,URGENTE CONSULTA EXTERNA,REFERENCIA,URGENTE REFERENCIA").split(",")]
-        emerg_cols = [c.strip() for c in self.config.get("ColumnasMerge", "Emergencia",
-                     fallback="Emergencia,Sin tipo atención").split(",")]
+        hosp_cols = self.get_merge_columns("HospitalizacionTotal")
+        cons_cols = self.get_merge_columns("ConsultaExternaTotal")
+        emerg_cols = self.get_merge_columns("Emergencia")
         
         self.log(f"   📊 Columnas combinadas:")
         self.log(f"      Hospitalización Total = {' + '.join(hosp_cols)}")
         self.log(f"      Consulta Externa Total = {' + '.join(cons_cols)}")
         self.log(f"      Emergencia = {' + '.join(emerg_cols)}")
         
-        # Calcular columnas combinadas
-        summary_table['Hospitalización Total'] = sum(safe_get_col(summary_table, col) for col in hosp_cols)
-        summary_table['Consulta Externa Total'] = sum(safe_get_col(summary_table, col) for col in cons_cols)
-        summary_table['Emergencia'] = sum(safe_get_col(summary_table, col) for col in emerg_cols)
+        # Calcular columnas combinadas sobre un único buffer NumPy con todas las
+        # columnas de origen (columnas inexistentes cuentan como 0)
+        merges = (
+            ('Hospitalización Total', hosp_cols),
+            ('Consulta Externa Total', cons_cols),
+            ('Emergencia', emerg_cols),
+        )
+        source_cols = list(dict.fromkeys(col for _, cols in merges for col in cols))
+        col_idx = {col: i for i, col in enumerate(source_cols)}
+        buffer = summary_table.reindex(columns=source_cols, fill_value=0).to_numpy()
+        for target, cols in merges:
+            summary_table[target] = buffer[:, [col_idx[col] for col in cols]].sum(axis=1)
         
         # Totales
         total_cols = list(set(
@@ -1885,16 +2610,15 @@ class EstadisticaHospitalApp:
              if col in summary_table.columns]
         ))
         
-        totals = summary_table.groupby('date', as_index=False)[total_cols].sum()
-        totals['Category'] = 'TOTAL'
+        # observed/sort: solo fechas presentes y sin ordenar (se ordena tras concatenar)
+        totals = summary_table.groupby('date', observed=True, sort=False, as_index=False)[total_cols].sum()
+        totals['Category'] = pd.Categorical.from_codes([category_index['TOTAL']] * len(totals),
+                                                       dtype=category_dtype)
         
         summary_table = pd.concat([summary_table, totals], ignore_index=True, sort=False)
         
         # Ordenar
-        summary_table['cat_order'] = summary_table['Category'].apply(
-            lambda x: CATEGORY_ORDER.index(x) if x in CATEGORY_ORDER else 999
-        )
-        summary_table = summary_table.sort_values(['date', 'cat_order']).drop('cat_order', axis=1)
+        summary_table = summary_table.sort_values(['date', 'Category'])
         
         # Reordenar columnas
         final_cols = ['Category', 'date', 'Hospitalización Total', 'Consulta Externa Total', 
@@ -1905,62 +2629,65 @@ class EstadisticaHospitalApp:
         
         # Formatear fechas
         if 'date' in summary_table.columns:
-            summary_table['date'] = pd.to_datetime(summary_table['date']).dt.strftime('%Y-%m-%d')
+            summary_table['date'] = summary_table['date'].dt.strftime('%Y-%m-%d')
             summary_table = summary_table.rename(columns={'date': 'Fecha'})
-        if 'date' in examenes_categorizados.columns:
-            examenes_categorizados['date'] = pd.to_datetime(examenes_categorizados['date']).dt.strftime('%Y-%m-%d')
-            examenes_categorizados = examenes_categorizados.rename(columns={'date': 'Fecha'})
-        if 'date' in datos_descargados.columns:
-            datos_descargados['date'] = pd.to_datetime(datos_descargados['date']).dt.strftime('%Y-%m-%d')
-            datos_descargados = datos_descargados.rename(columns={'date': 'Fecha'})
+        # Las fechas de los registros se formatean una sola vez (los categorizados son
+        # un subconjunto de los descargados) y se renombra in situ, sin copiar las hojas
+        fechas = datos_descargados['date'].dt.strftime('%Y-%m-%d')
+        datos_descargados['date'] = fechas
+        datos_descargados.rename(columns={'date': 'Fecha'}, inplace=True)
+        examenes_categorizados['date'] = fechas.reindex(examenes_categorizados.index)
+        examenes_categorizados.rename(columns={'date': 'Fecha'}, inplace=True)
         
         # Guardar Excel
         self.log(f"   Guardando {output_file.name}...")
         
         try:
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                summary_table.to_excel(writer, sheet_name='Estadistica Calculada', index=False)
-                examenes_categorizados.to_excel(writer, sheet_name='Examenes Categorizados', index=False)
-                datos_descargados.to_excel(writer, sheet_name='Datos Descargados', index=False)
-                
-                for sheet_name in writer.sheets:
-                    ws = writer.sheets[sheet_name]
-                    ws.freeze_panes = 'A2'
-                    ws.auto_filter.ref = ws.dimensions
+            sheets = (
+                ('Estadistica Calculada', summary_table),
+                ('Examenes Categorizados', examenes_categorizados),
+                ('Datos Descargados', datos_descargados),
+            )
+            if HAS_XLSXWRITER:
+                writer = pd.ExcelWriter(output_file, engine='xlsxwriter',
+                                        engine_kwargs={'options': {'strings_to_urls': False}})
+            else:
+                writer = pd.ExcelWriter(output_file, engine='openpyxl')
+            
+            with writer:
+                for sheet_name, sheet_df in sheets:
+                    sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
                     
-                    for column in ws.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        
-                        for cell in column:
-                            try:
-                                cell_value = str(cell.value) if cell.value is not None else ""
-                                cell_length = len(cell_value)
-                                if cell_length > max_length:
-                                    max_length = cell_length
-                            except:
-                                pass
-                        
-                        adjusted_width = min(max_length + 2, 50)
-                        ws.column_dimensions[column_letter].width = adjusted_width
+                    # Anchos calculados sobre el DataFrame, sin recorrer las celdas
+                    widths = excel_column_widths(sheet_df)
+                    ws = writer.sheets[sheet_name]
+                    if HAS_XLSXWRITER:
+                        ws.freeze_panes(1, 0)
+                        if widths:
+                            ws.autofilter(0, 0, len(sheet_df), len(widths) - 1)
+                        for i, width in enumerate(widths):
+                            ws.set_column(i, i, width)
+                    else:
+                        ws.freeze_panes = 'A2'
+                        ws.auto_filter.ref = ws.dimensions
+                        for i, width in enumerate(widths, start=1):
+                            ws.column_dimensions[get_column_letter(i)].width = width
             
             self.log(f"   ✅ Archivo guardado: {output_file}")
             
         except PermissionError:
             self.log(f"   ❌ Error: No se puede escribir el archivo. ¿Está abierto en Excel?")
-            self.root.after(0, lambda: messagebox.showerror(
+            self.call_in_ui(
+                messagebox.showerror,
                 "Error de Escritura",
                 f"No se puede escribir el archivo '{output_file.name}'.\n\n"
                 "Por favor, cierre Excel e intente nuevamente."
-            ))
+            )
 
 
 def main():
     root = tk.Tk()
     
-    style = ttk.Style()
-    style.theme_use('clam')
-    
     app = EstadisticaHospitalApp(root)
     root.mainloop()
 
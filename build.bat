@@ -6,7 +6,7 @@ echo.
 
 REM Install dependencies
 echo Installing dependencies...
-pip install pyinstaller pandas openpyxl playwright tkcalendar babel --quiet
+pip install pyinstaller pandas openpyxl playwright tkcalendar babel orjson python-calamine xlsxwriter --quiet
 
 REM Build the executable
 echo.